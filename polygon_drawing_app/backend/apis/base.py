@@ -2,13 +2,17 @@ from fastapi import APIRouter
 
 from apis.v1.route_camera import CameraController
 from apis.v1.route_tracking import TrackingController
+from apis.v1.route_metrics import MetricsController
 
 api_router = APIRouter()
 
 # Controller
 camera_controller = CameraController()
 tracking_controller = TrackingController()
+metrics_controller = MetricsController()
 
 # Routes
 api_router.include_router(camera_controller.router, prefix="/api/v1/camera", tags=["Camera"])
-api_router.include_router(tracking_controller.router, prefix="/api/v1/tracking", tags=["Tracking"])
\ No newline at end of file
+api_router.include_router(tracking_controller.router, prefix="/api/v1/tracking", tags=["Tracking"])
+# Scraped by Prometheus at the conventional root path
+api_router.include_router(metrics_controller.router, tags=["Metrics"])
\ No newline at end of file
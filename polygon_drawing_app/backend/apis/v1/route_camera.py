@@ -1,38 +1,52 @@
-import base64
+import asyncio
 
-import cv2
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import text
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from db.models import Camera
-from db.session import get_db
+from db.session import get_async_db
 # ✅ Cập nhật import
-from schemas.camera import CameraShow, CameraUpdatePoints
+from schemas.camera import CameraShow, CameraUpdatePoints, CameraUpdateStream
+from services.camera_config import camera_config
+from services.camera_registry import camera_registry
+from services.frame_extractor import frame_extractor
+from services.imaging_executor import imaging_executor, ImagingBusy
+from utils import etag_matches, retry_later
+from config import IMAGING_RETRY_AFTER, CAMERA_CONFIG_RETRY_SECONDS
 
 router = APIRouter()
 
-def extract_frame_to_base64(video_path: str, frame_number: int) -> str:
-    # ... (Không thay đổi) ...
-    cap = cv2.VideoCapture(video_path)
-
-    curr_frame = 0
-    base64_str = None
-
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        if curr_frame == frame_number:
-            _, buffer = cv2.imencode('.jpg', frame)
-            base64_str = base64.b64encode(buffer).decode("utf-8")
-            break
-
-        curr_frame += 1
-
-    cap.release()
-    return base64_str if base64_str else None
+# Frame of each camera's video used as its thumbnail in the camera list
+THUMBNAIL_FRAME = 10
+
+async def video_frame_response(request: Request, video_path: str, frame_number: int) -> Response:
+    """
+    Serves a frame of a video file as a JPEG, with an ETag derived from the
+    file and frame number; answers 304 when the client already has it.
+    """
+    etag = frame_extractor.etag(video_path, frame_number)
+    if etag is None:
+        raise HTTPException(status_code=404, detail="Video not found")
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        # Decoding (on a cache miss) runs on the imaging executor
+        jpeg = await imaging_executor.run(frame_extractor.get_jpeg, video_path, frame_number)
+    except ImagingBusy:
+        raise retry_later("Imaging is overloaded", IMAGING_RETRY_AFTER)
+    if jpeg is None:
+        raise HTTPException(status_code=404, detail="Frame not found")
+    return Response(content=jpeg, media_type="image/jpeg", headers=headers)
+
+
+def ensure_camera_config():
+    """Loads the camera config cache if startup couldn't reach the database."""
+    if not camera_config.ensure_loaded():
+        raise retry_later("Camera configuration unavailable", CAMERA_CONFIG_RETRY_SECONDS)
 
 
 class CameraController:
@@ -40,55 +54,64 @@ class CameraController:
         self.router = APIRouter(redirect_slashes=False)
         self.router.add_api_route("", self.get_camera, methods=["GET"])
         self.router.add_api_route("/frame/{frame_number}", self.get_frame_camera, methods=["GET"])
+        self.router.add_api_route("/{serial_number}/thumbnail", self.get_camera_thumbnail, methods=["GET"])
+        self.router.add_api_route("/reconcile", self.reconcile_cameras, methods=["POST"])
+        self.router.add_api_route("/{serial_number}/stream", self.update_camera_stream, methods=["PUT"])
         self.router.add_api_route("/{serial_number}", self.update_camera, methods=["PUT"])
         self.router.add_api_route("/{serial_number}", self.get_camera_by_serial_number, methods=["GET"])
 
     @staticmethod
     def get_camera(
-        session: Session = Depends(get_db)
+        request: Request
     ):
-        query = text(
-            """
-            SELECT serial_number, name, points
-            FROM camera
-            ORDER BY name
-            """
-        )
-
-        rows = session.execute(query).fetchall()
+        """Lists cameras; each thumbnail is a separate, cacheable image at `image_url`."""
+        ensure_camera_config()
 
         results = []
-        for row in rows:
-            video_path = f"assets/{row.name}.mp4"
-
+        for entry in camera_config.all():
             # ✅ `points` bây giờ là một list các object, không phải list các list
             camera = CameraShow(
-                serial_number=row[0],
-                name=row[1],
-                points=row[2],
-                image=extract_frame_to_base64(video_path, 10)
+                serial_number=entry.serial_number,
+                name=entry.name,
+                points=entry.points,
+                # Absolute: the frontend is served from another origin
+                image_url=str(request.url_for("get_camera_thumbnail", serial_number=entry.serial_number))
             )
             results.append(camera)
 
         return results
 
     @staticmethod
-    def get_frame_camera(
-        frame_number: int
+    async def get_frame_camera(
+        frame_number: int,
+        request: Request
     ):
-        # ... (Không thay đổi) ...
-        """Extract a specific frame and convert it to Base64."""
+        """Returns a specific frame of the demo video as a JPEG."""
         video_path = "assets/MCT-1.1.mp4"
-        return extract_frame_to_base64(video_path, frame_number)
+        return await video_frame_response(request, video_path, frame_number)
 
     @staticmethod
-    def update_camera(
+    async def get_camera_thumbnail(
+        serial_number: str,
+        request: Request
+    ):
+        """Returns the camera's thumbnail as a JPEG."""
+        if not camera_config.is_loaded():
+            await asyncio.to_thread(ensure_camera_config)
+        entry = camera_config.get(serial_number)
+        if entry is None:
+            raise HTTPException(status_code=404, detail="Item not found")
+        return await video_frame_response(request, f"assets/{entry.name}.mp4", THUMBNAIL_FRAME)
+
+    @staticmethod
+    async def update_camera(
         serial_number: str,
         # ✅ Sử dụng schema đã cập nhật
         item: CameraUpdatePoints,
-        session: Session = Depends(get_db)
+        session: AsyncSession = Depends(get_async_db)
     ):
-        db_item = session.query(Camera).filter(Camera.serial_number == serial_number).first()
+        result = await session.execute(select(Camera).where(Camera.serial_number == serial_number))
+        db_item = result.scalars().first()
         if db_item is None:
             raise HTTPException(status_code=404, detail="Item not found")
 
@@ -96,16 +119,45 @@ class CameraController:
             setattr(db_item, key, value)
 
         session.add(db_item)
-        session.commit()
-        session.refresh(db_item)
+        await session.commit()
+        await session.refresh(db_item)
+
+        # Write-through: readers, including zone counting, see the new polygons from now on
+        camera_config.update(db_item)
         return db_item
-    
+
     @staticmethod
-    def get_camera_by_serial_number(
+    async def update_camera_stream(
         serial_number: str,
-        session: Session = Depends(get_db)
+        item: CameraUpdateStream,
+        session: AsyncSession = Depends(get_async_db)
     ):
-        db_item = session.query(Camera).filter(Camera.serial_number == serial_number).first()
+        """Changes a camera's capture source; capture switches over without a restart."""
+        result = await session.execute(select(Camera).where(Camera.serial_number == serial_number))
+        db_item = result.scalars().first()
         if db_item is None:
             raise HTTPException(status_code=404, detail="Item not found")
-        return db_item
\ No newline at end of file
+
+        db_item.stream_url = item.stream_url
+        session.add(db_item)
+        await session.commit()
+        await session.refresh(db_item)
+
+        camera_config.update(db_item)
+        changes = await asyncio.to_thread(camera_registry.reconcile, False)
+        return {"camera": camera_config.get(serial_number).to_dict(), "changes": changes}
+
+    @staticmethod
+    async def reconcile_cameras():
+        """Re-reads the camera table and starts or stops capture to match it."""
+        return await asyncio.to_thread(camera_registry.reconcile)
+    
+    @staticmethod
+    def get_camera_by_serial_number(
+        serial_number: str
+    ):
+        ensure_camera_config()
+        entry = camera_config.get(serial_number)
+        if entry is None:
+            raise HTTPException(status_code=404, detail="Item not found")
+        return entry.to_dict()
\ No newline at end of file
@@ -0,0 +1,31 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+from prometheus_client import multiprocess
+
+from config import METRICS_MULTIPROC_DIR
+from services.count_writer import count_writer
+from services.imaging_executor import imaging_executor
+from services.metrics import RuntimeCollector
+from services.rtsp_fetcher import rtsp_fetcher
+
+runtime_collector = RuntimeCollector(rtsp_fetcher, imaging_executor, count_writer)
+
+if METRICS_MULTIPROC_DIR:
+    # Every worker writes its metrics to the directory; a scrape merges them all
+    metrics_registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(metrics_registry)
+else:
+    metrics_registry = REGISTRY
+metrics_registry.register(runtime_collector)
+
+
+class MetricsController:
+    def __init__(self):
+        self.router = APIRouter(redirect_slashes=False)
+        self.router.add_api_route("/metrics", self.get_metrics, methods=["GET"])
+
+    @staticmethod
+    def get_metrics():
+        """Prometheus metrics in the text exposition format."""
+        return Response(content=generate_latest(metrics_registry), media_type=CONTENT_TYPE_LATEST)
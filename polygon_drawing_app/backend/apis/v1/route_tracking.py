@@ -1,63 +1,217 @@
 import os
 import json
 import asyncio
-import cv2
-from typing import Dict
+import time
+from typing import Callable, Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, HTTPException, Request, Body
+from fastapi import APIRouter, HTTPException, Request, Body, Depends
 from fastapi.responses import StreamingResponse, Response
-from services.rtsp_fetcher import rtsp_fetcher
-from schemas.vehicle_data import VehicleBatchData
-from config import RTMP_STREAMS
-from datetime import datetime, timedelta
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.session import get_async_db
+from services.rtsp_fetcher import rtsp_fetcher, FRAME_INTERVAL
+from services.frame_encoder import frame_encoder
+from services.stream_quality import StreamQuality
+from services.broadcast_hub import BroadcastHub, STREAM_MODES, STREAM_FORMATS
+from services.zone_counter import zone_counter
+from services.camera_config import camera_config
+from services.count_writer import count_writer
+from services.state_backend import state_backend
+from services.chart_history import chart_history, RESOLUTIONS
+from services.window_aggregator import window_aggregator, CAMERA_TOTAL
+from services.result_tailer import result_tailer
+from services.imaging_executor import imaging_executor, ImagingBusy
+from services.metrics import (
+    MJPEG_CLIENTS, MJPEG_FRAMES_SENT, SSE_CLIENTS, INGEST_UPDATES, INGEST_REJECTED, INGEST_HANDLER_SECONDS,
+)
+from utils import etag_matches, retry_later
+from pydantic import ValidationError
+from schemas.vehicle_data import VehicleBatchData, VehicleBulkData, ZoneData, DetectionBatch
+from config import (
+    SSE_KEEPALIVE_SECONDS, INGEST_BATCH_SIZE, COUNT_STORE_ENABLED, WINDOW_REFRESH_SECONDS, IMAGING_RETRY_AFTER,
+    CAMERA_CONFIG_RETRY_SECONDS, INGEST_MAX_LINE_BYTES,
+)
+from datetime import datetime, timedelta, timezone
 
 router = APIRouter()
-update_event = asyncio.Event()
 
-# Stores cumulative counts that reset only once per hour
-vehicle_data_cumulative_store: Dict[str, Dict[str, Dict[str, int]]] = {}
-
-# Stores frontend-facing data to stream to clients (copied from cumulative store)
-vehicle_data_store: Dict[str, Dict[str, Dict[str, int]]] = {}
+# How long an MJPEG stream blocks waiting for a new frame before re-checking
+FRAME_WAIT_TIMEOUT = 1.0
+
+# A snapshot older than this waits up to SNAPSHOT_WAIT_TIMEOUT for a newly decoded frame
+SNAPSHOT_MAX_AGE = 1.0
+SNAPSHOT_WAIT_TIMEOUT = 2.0
+
+# Bucket sizes accepted by /counts, as understood by Postgres date_trunc
+COUNT_BUCKETS = ("second", "minute", "hour", "day")
+
+# Broadcasts each new version of a camera's vehicle data to every SSE client
+vehicle_data_hub = BroadcastHub(
+    state_backend.counts,
+    compact_item=lambda counts: [counts["number_of_motorbike"], counts["number_of_car"]],
+    name="vehicle_data",
+)
+
+# Broadcasts the rolling window totals of a camera's zones
+vehicle_window_hub = BroadcastHub(
+    window_aggregator.snapshot,
+    compact_item=lambda windows: {
+        name: [counts["number_of_motorbike"], counts["number_of_car"]] for name, counts in windows.items()
+    },
+    name="vehicle_windows",
+)
+
+# Key of the site-wide totals in overview snapshots
+SITE_TOTAL = "*"
+
+# Overview streams per requested set of cameras ("" for all of them):
+# view key -> [cameras, or None for all; number of connected clients]
+overview_views: Dict[str, list] = {}
+
+def open_overview_view(view: str, cameras: Optional[List[str]]):
+    entry = overview_views.setdefault(view, [frozenset(cameras) if cameras else None, 0])
+    entry[1] += 1
+
+def close_overview_view(view: str):
+    entry = overview_views.get(view)
+    if entry is None:
+        return
+    entry[1] -= 1
+    if entry[1] <= 0:
+        del overview_views[view]
+        # Its snapshot would go stale with nobody publishing to it
+        overview_hub.discard(view)
+
+def parse_camera_list(cameras: Optional[str]) -> Optional[List[str]]:
+    """A comma-separated `cameras` query parameter as a sorted list; None means every camera."""
+    if not cameras:
+        return None
+    return sorted({camera_id.strip() for camera_id in cameras.split(",") if camera_id.strip()})
+
+def camera_overview(camera_id: str) -> dict:
+    return {
+        "totals": dict(state_backend.totals(camera_id)),
+        "zones": {zone: dict(counts) for zone, counts in state_backend.counts(camera_id).items()},
+    }
+
+def overview_snapshot(view: str) -> dict:
+    cameras = overview_views.get(view, [None])[0]
+    snapshot = {camera_id: camera_overview(camera_id) for camera_id in sorted(cameras or state_backend.camera_ids())}
+    snapshot[SITE_TOTAL] = {"totals": dict(state_backend.site_totals())}
+    return snapshot
+
+# Broadcasts the counts and totals of several cameras; channels are overview views
+overview_hub = BroadcastHub(
+    overview_snapshot,
+    compact_item=lambda overview: {
+        "t": [overview["totals"]["number_of_motorbike"], overview["totals"]["number_of_car"]],
+        "z": {zone: [counts["number_of_motorbike"], counts["number_of_car"]]
+              for zone, counts in overview.get("zones", {}).items()},
+    },
+    name="overview",
+)
+
+def on_counts_changed(camera_id: str, deltas: Dict[str, Tuple[int, int]]):
+    """
+    Called by the state backend for every change of a camera's counts, made
+    by this worker or another one: updates the rolling windows and the chart
+    history, and notifies subscribers.
+    """
+    for zone, (motorbikes, cars) in deltas.items():
+        if motorbikes or cars:
+            window_aggregator.add(camera_id, zone, motorbikes, cars)
+    totals = state_backend.totals(camera_id)
+    chart_history.record(camera_id, totals["number_of_motorbike"], totals["number_of_car"])
+
+    zones = set(deltas)
+    vehicle_data_hub.publish(camera_id, zones)
+    vehicle_window_hub.publish(camera_id, zones | {CAMERA_TOTAL})
+    for view, (cameras, _) in overview_views.items():
+        # Every view carries the site totals, which just changed
+        if cameras is None or camera_id in cameras:
+            overview_hub.publish(view, {camera_id, SITE_TOTAL})
+        else:
+            overview_hub.publish(view, {SITE_TOTAL})
 
-# Stores data for the Overview page, a snapshot of the cumulative store.
-overview_data_store: Dict[str, Dict[str, Dict[str, int]]] = {}
+state_backend.on_change(on_counts_changed)
 
-# Stores historical data for the chart, with cumulative counts
-chart_history_store: Dict[str, list] = {}
+async def apply_vehicle_batches(batches: List[VehicleBatchData]):
+    """
+    Adds a group of per-camera count updates to the state backend in one
+    step, so subscribers are notified once per camera touched. Increments
+    are also queued for the durable count store.
+    """
+    increments: Dict[str, Dict[str, Tuple[int, int]]] = {}
+    for data in batches:
+        camera_increments = increments.setdefault(data.camera_id, {})
+        for zone_data in data.zones:
+            motorbikes, cars = camera_increments.get(zone_data.zone, (0, 0))
+            camera_increments[zone_data.zone] = (
+                motorbikes + zone_data.number_of_motorbike, cars + zone_data.number_of_car
+            )
+            if COUNT_STORE_ENABLED and (zone_data.number_of_motorbike or zone_data.number_of_car):
+                count_writer.record(
+                    data.camera_id, zone_data.zone, zone_data.number_of_motorbike, zone_data.number_of_car
+                )
 
-# One asyncio.Queue per camera for efficient notification of updates to streaming clients
-update_queues: Dict[str, asyncio.Queue] = {}
+    await state_backend.increment(increments)
 
-def get_update_queue(camera_id: str):
-    if camera_id not in update_queues:
-        update_queues[camera_id] = asyncio.Queue()
-        print(f"[INFO] Initialized update queue for camera {camera_id}")
-    return update_queues[camera_id]
+def is_known_camera(camera_id: str) -> bool:
+    """Whether a camera is configured or has counts; streams of other ids are refused."""
+    return camera_config.get(camera_id) is not None or bool(state_backend.counts(camera_id))
 
-async def reset_counts_periodically():
+def hub_event_stream(hub: BroadcastHub, camera_id: str, request: Request, mode: str, fmt: str,
+                     refresh_interval: Optional[float] = None,
+                     on_open: Optional[Callable[[], None]] = None, on_close: Optional[Callable[[], None]] = None):
     """
-    Background task: resets cumulative counts every hour,
-    notifies frontend clients of reset event (without immediately resetting frontend view).
+    Builds the SSE response for one camera of a BroadcastHub. With
+    `refresh_interval`, the camera is republished when it has been quiet that
+    long, for snapshots that change with time alone. `on_open` and `on_close`
+    are called when the stream starts and ends.
     """
-    while True:
-        now = datetime.now()
-        next_hour = (now + timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
-        wait_time = (next_hour - now).total_seconds()
-        await asyncio.sleep(wait_time)
+    if mode not in STREAM_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(STREAM_MODES)}")
+    if fmt not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(STREAM_FORMATS)}")
+
+    # An id from another process or an older channel resyncs with a snapshot
+    since = hub.resume_version(camera_id, request.headers.get("last-event-id", ""))
+    timeout = min(refresh_interval, SSE_KEEPALIVE_SECONDS) if refresh_interval else SSE_KEEPALIVE_SECONDS
+
+    async def event_generator():
+        clients = SSE_CLIENTS.labels(hub.name)
+        clients.inc()
+        if on_open:
+            on_open()
+        try:
+            message = hub.message(camera_id, mode, fmt, since)
+            version = hub.version(camera_id)
+            yield message
+
+            while True:
+                update = await hub.wait(camera_id, version, timeout=timeout)
 
-        print(f"[INFO] Resetting cumulative vehicle counts at {datetime.now()}")
+                if await request.is_disconnected():
+                    print(f"[INFO] Client disconnected from SSE stream for camera {camera_id}")
+                    break
+
+                if update is None:
+                    if refresh_interval:
+                        hub.publish(camera_id)
+                        continue
+                    # SSE comment line, ignored by EventSource but keeps proxies from timing out
+                    yield ": keep-alive\n\n"
+                    continue
 
-        for camera_id in vehicle_data_cumulative_store.keys():
-            for zone in vehicle_data_cumulative_store[camera_id].keys():
-                vehicle_data_cumulative_store[camera_id][zone] = {
-                    "number_of_motorbike": 0,
-                    "number_of_car": 0,
-                }
-            queue = get_update_queue(camera_id)
-            await queue.put(camera_id)
+                message = hub.message(camera_id, mode, fmt, since=version)
+                version = hub.version(camera_id)
+                yield message
+        finally:
+            clients.dec()
+            if on_close:
+                on_close()
 
-        print(f"[INFO] Reset event notification sent at {datetime.now()}")
+    return StreamingResponse(event_generator(), media_type="text/event-stream")
 
 class TrackingController:
     # Class variable to track processing videos
@@ -66,99 +220,164 @@ class TrackingController:
     def __init__(self):
         self.router = APIRouter(redirect_slashes=False)
         self.router.add_api_route("/overview-data/{camera_id}", self.get_overview_data, methods=["GET"])
+        self.router.add_api_route("/overview", self.get_overview, methods=["GET"])
+        self.router.add_api_route("/overview-stream", self.stream_overview, methods=["GET"])
         self.router.add_api_route("/stream-data/{video_name}", self.stream_video_data, methods=["GET"])
         self.router.add_api_route("/data/{video_name}", self.get_video_data, methods=["GET"])
         self.router.add_api_route("/stream-rtsp/{serial_number}", self.stream_rtsp_camera, methods=["GET"])
         self.router.add_api_route("/latest-frame/{serial_number}", self.get_latest_frame, methods=["GET"])
+        self.router.add_api_route("/capture-health", self.get_capture_health, methods=["GET"])
+        self.router.add_api_route("/imaging-stats", self.get_imaging_stats, methods=["GET"])
         
         self.router.add_api_route("/vehicle-data-batch", TrackingController.post_vehicle_data_batch, methods=["POST"])
+        self.router.add_api_route("/vehicle-data-bulk", self.post_vehicle_data_bulk, methods=["POST"])
+        self.router.add_api_route("/vehicle-data-ingest", self.ingest_vehicle_data_stream, methods=["POST"])
+        self.router.add_api_route("/detections", self.post_detections, methods=["POST"])
         self.router.add_api_route("/vehicle-data-stream/{camera_id}", self.stream_vehicle_data, methods=['GET'])
+        self.router.add_api_route("/vehicle-window-stream/{camera_id}", self.stream_vehicle_windows, methods=['GET'])
         self.router.add_api_route("/chart-history/{camera_id}", self.get_chart_history, methods=["GET"])
+        self.router.add_api_route("/counts/{camera_id}", self.get_count_history, methods=["GET"])
         self.router.add_api_route("/update-and-get-overview", self.update_and_get_overview, methods=["POST"]) # New Endpoint
 
     @staticmethod
     async def stream_video_data(video_name: str):
         """Stream real-time data from video processing"""
         async def event_generator():
-            data_file = os.path.join("backend", "data", f"{video_name}.json")
             last_frame = 0
-            
-            while TrackingController.processing_videos.get(video_name, False):
-                try:
-                    if os.path.exists(data_file):
-                        with open(data_file, "r") as f:
-                            data = json.load(f)
-                        
-                        if data and len(data) > 0:
-                            latest_frame = data[-1]
-                            if latest_frame.get('frame', 0) > last_frame:
-                                last_frame = latest_frame.get('frame', 0)
-                                
-                                frame_data = {
-                                    "type": "frame_update",
-                                    "frame_number": last_frame,
-                                    "zone_data": latest_frame.get('evaluate', [])
-                                }
-                                yield f"data: {json.dumps(frame_data)}\n\n"
-                        
+            clients = SSE_CLIENTS.labels("video_data")
+            clients.inc()
+            try:
+                while TrackingController.processing_videos.get(video_name, False):
+                    try:
+                        latest_frame = await asyncio.to_thread(result_tailer.latest, video_name)
+                        if latest_frame and latest_frame.get('frame', 0) > last_frame:
+                            last_frame = latest_frame.get('frame', 0)
+
+                            frame_data = {
+                                "type": "frame_update",
+                                "frame_number": last_frame,
+                                "zone_data": latest_frame.get('evaluate', [])
+                            }
+                            yield f"data: {json.dumps(frame_data)}\n\n"
+
+                        await asyncio.sleep(1)
+
+                    except Exception as e:
+                        print(f"Error in stream_video_data: {e}")
                         await asyncio.sleep(1)
-                        
-                except Exception as e:
-                    print(f"Error in stream_video_data: {e}")
-                    await asyncio.sleep(1)
-            
-            yield f"data: {json.dumps({'type': 'processing_complete'})}\n\n"
+
+                yield f"data: {json.dumps({'type': 'processing_complete'})}\n\n"
+            finally:
+                clients.dec()
 
         return StreamingResponse(event_generator(), media_type="text/event-stream")
 
     @staticmethod
-    def get_overview_data(camera_id: str):
+    async def get_overview_data(camera_id: str):
         """
         Returns a snapshot of vehicle data for the Overview page.
         """
-        data = overview_data_store.get(camera_id, {})
-        return {"camera_id": camera_id, "data": data}
+        data = await state_backend.load_snapshot("overview", camera_id)
+        return {"camera_id": camera_id, "data": data, "windows": window_aggregator.totals(camera_id)}
+
+    @staticmethod
+    def get_overview(cameras: Optional[str] = None):
+        """
+        Returns the zone counts and totals of several cameras, and the totals
+        of the whole site, in one response. `cameras` is a comma-separated
+        list of serial numbers; all cameras are returned without it. Totals
+        are maintained at ingest, so nothing is summed here.
+        """
+        camera_ids = parse_camera_list(cameras)
+        return {
+            "cameras": {camera_id: camera_overview(camera_id) for camera_id in camera_ids or state_backend.camera_ids()},
+            "site": dict(state_backend.site_totals()),
+        }
+
+    @staticmethod
+    async def stream_overview(request: Request, cameras: Optional[str] = None, mode: str = "full",
+                              format: str = "json"):
+        """
+        SSE endpoint streaming the overview of several cameras, as
+        `{camera_id: {"totals": counts, "zones": {zone: counts}}}` with the
+        site totals under "*". Takes the same `cameras` filter as /overview
+        and the same mode and format options as vehicle-data-stream; deltas
+        hold only the cameras that changed. Viewers of the same cameras share
+        every encoded message.
+        """
+        camera_ids = parse_camera_list(cameras)
+        view = ",".join(camera_ids) if camera_ids else ""
+        return hub_event_stream(
+            overview_hub, view, request, mode, format,
+            on_open=lambda: open_overview_view(view, camera_ids),
+            on_close=lambda: close_overview_view(view),
+        )
 
     @staticmethod
     def get_video_data(video_name: str):
         """Get current video processing data"""
-        data_file = os.path.join("backend", "data", f"{video_name}.json")
         try:
-            if os.path.exists(data_file):
-                with open(data_file, "r") as f:
-                    data = json.load(f)
-                return data[-1] if data else {"evaluate": []}
-            else:
-                return {"evaluate": []}
+            latest_frame = result_tailer.latest(video_name)
+            return latest_frame if latest_frame is not None else {"evaluate": []}
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error reading video data: {str(e)}")
     
     @staticmethod
-    def stream_rtsp_camera(serial_number: str):
-        if serial_number not in rtsp_fetcher.latest_frames and serial_number not in RTMP_STREAMS:
+    async def stream_rtsp_camera(serial_number: str):
+        """
+        MJPEG stream of a camera. Runs on the event loop: waiting for frames
+        holds no thread, and JPEG encoding goes to the imaging executor.
+
+        Each client always gets the newest frame, so frames captured while a
+        slow client was still receiving the previous one are skipped rather
+        than queued. The resolution and JPEG quality adapt to how fast the
+        client drains (see StreamQuality); clients on the same level share
+        each encode.
+        """
+        if not rtsp_fetcher.has_camera(serial_number):
             raise HTTPException(status_code=404, detail="Camera not found")
-
-        def frame_generator(camera_id):
-            while True:
-                frame = rtsp_fetcher.get_latest_frame(camera_id)
-                if frame is None:
-                    continue
-
-                frame_bgr = frame.copy()
-                target_width, target_height = 1280, 720
-                resized_frame = cv2.resize(frame_bgr, (target_width, target_height), interpolation=cv2.INTER_LINEAR)
-
-                encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), 90]
-                success, buffer_jpeg = cv2.imencode('.jpg', resized_frame, encode_param)
-
-                if not success:
-                    continue 
-
-                yield (
-                    b"--frame\r\n"
-                    b"Content-Type: image/jpeg\r\n\r\n" +
-                    buffer_jpeg.tobytes() + b"\r\n"
-                )
+        if imaging_executor.is_saturated():
+            raise retry_later("Imaging is overloaded", IMAGING_RETRY_AFTER)
+
+        async def frame_generator(camera_id):
+            last_seq = 0
+            last_sent = 0.0
+            quality = StreamQuality()
+            clients = MJPEG_CLIENTS.labels(camera_id)
+            clients.inc()
+            try:
+                while True:
+                    # Never send faster than VIDEO_FPS, even if the source does
+                    delay = FRAME_INTERVAL - (time.monotonic() - last_sent)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+
+                    # Keep the camera decoding for as long as this client is connected
+                    rtsp_fetcher.request_frames(camera_id)
+                    packet = await rtsp_fetcher.wait_for_frame_async(camera_id, last_seq, timeout=FRAME_WAIT_TIMEOUT)
+                    if packet is None:
+                        continue
+                    last_seq = packet.seq
+
+                    try:
+                        jpeg_bytes = await frame_encoder.get_jpeg_async(camera_id, packet, quality.level)
+                    except ImagingBusy:
+                        # Overloaded: skip this frame rather than queue behind others
+                        continue
+                    if jpeg_bytes is None:
+                        continue
+                    last_sent = time.monotonic()
+
+                    # Resumes once the server has handed the chunk to the client's connection
+                    yield (
+                        b"--frame\r\n"
+                        b"Content-Type: image/jpeg\r\n\r\n" +
+                        jpeg_bytes + b"\r\n"
+                    )
+                    MJPEG_FRAMES_SENT.labels(quality.level).inc()
+                    quality.observe(time.monotonic() - last_sent)
+            finally:
+                clients.dec()
 
         return StreamingResponse(
             frame_generator(camera_id=serial_number),
@@ -166,125 +385,306 @@ class TrackingController:
         )
 
     @staticmethod
-    def get_latest_frame(serial_number: str):
-        if serial_number not in rtsp_fetcher.latest_frames and serial_number not in RTMP_STREAMS:
+    async def get_latest_frame(serial_number: str, request: Request):
+        """
+        Returns the camera's latest frame as a JPEG. The ETag identifies the
+        frame, so a client that already has it gets 304 Not Modified.
+        """
+        if not rtsp_fetcher.has_camera(serial_number):
             raise HTTPException(status_code=404, detail="Camera not found")
         
-        frame = rtsp_fetcher.get_latest_frame(serial_number)
-
-        if frame is None:
+        # An unwatched camera is not being decoded, so the stored frame may be
+        # old: ask for decoding and wait briefly for a fresh one
+        rtsp_fetcher.request_frames(serial_number)
+        packet = rtsp_fetcher.get_latest_packet(serial_number)
+        stale = rtsp_fetcher.is_stale(serial_number)
+        if packet is None or (not stale and time.time() - packet.timestamp > SNAPSHOT_MAX_AGE):
+            fresh = await rtsp_fetcher.wait_for_frame_async(
+                serial_number, packet.seq if packet else 0, timeout=SNAPSHOT_WAIT_TIMEOUT
+            )
+            packet = fresh or packet
+
+        if packet is None:
             raise HTTPException(status_code=404, detail="Frame not available yet")
-        
-        frame_copy = frame.copy()
 
-        target_width, target_height = 1280, 720
-        resized_frame = cv2.resize(frame_copy, (target_width, target_height), interpolation=cv2.INTER_LINEAR)
+        # The capture timestamp tells apart frames with the same seq after a restart
+        headers = {"ETag": f'"{serial_number}-{packet.seq}-{int(packet.timestamp * 1000)}"', "Cache-Control": "no-cache"}
+        if stale:
+            # The camera is reconnecting; this is its last good frame
+            headers["X-Frame-Stale"] = "true"
+        if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+            return Response(status_code=304, headers=headers)
 
-        encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), 90]
-        success, buffer_jpeg = cv2.imencode('.jpg', resized_frame, encode_param)
-
-        if not success:
+        try:
+            jpeg_bytes = await frame_encoder.get_jpeg_async(serial_number, packet)
+        except ImagingBusy:
+            raise retry_later("Imaging is overloaded", IMAGING_RETRY_AFTER)
+        if jpeg_bytes is None:
             raise HTTPException(status_code=500, detail="Failed to encode frame to JPEG")
-        jpeg_bytes = buffer_jpeg.tobytes()
 
-        return Response(content=jpeg_bytes, media_type="image/jpeg")
+        return Response(content=jpeg_bytes, media_type="image/jpeg", headers=headers)
+
+    @staticmethod
+    def get_capture_health():
+        """
+        Returns per-camera capture status: whether the capture is alive,
+        the latest frame sequence number and the age of that frame in seconds.
+        """
+        return rtsp_fetcher.get_health()
+
+    @staticmethod
+    def get_imaging_stats():
+        """
+        Returns the imaging executor's load: busy workers, queued jobs,
+        rejections and how long jobs waited for a worker.
+        """
+        return imaging_executor.stats()
     
     @staticmethod
     async def post_vehicle_data_batch(data: VehicleBatchData = Body(...)):
         """
         Receives real-time vehicle count updates and updates the main store.
         """
-        camera_id = data.camera_id
-        zones = data.zones
-
-        if camera_id not in vehicle_data_store:
-            vehicle_data_store[camera_id] = {}
-        for zone_data in zones:
-            zone = zone_data.zone
-            if zone not in vehicle_data_store[camera_id]:
-                vehicle_data_store[camera_id][zone] = {"number_of_motorbike": 0, "number_of_car": 0}
-            vehicle_data_store[camera_id][zone]["number_of_motorbike"] += zone_data.number_of_motorbike
-            vehicle_data_store[camera_id][zone]["number_of_car"] += zone_data.number_of_car
+        with INGEST_HANDLER_SECONDS.labels("batch").time():
+            await apply_vehicle_batches([data])
+        INGEST_UPDATES.labels("batch").inc()
 
-        queue = get_update_queue(camera_id)
-        await queue.put(camera_id)
-        
         return {"message": "Vehicle data received and distributed."}
+
+    @staticmethod
+    async def post_vehicle_data_bulk(request: Request):
+        """
+        Receives updates for many cameras in one request:
+        `{"batches": [VehicleBatchData, ...]}`. The body is validated straight
+        from JSON bytes in a single pass.
+        """
+        body = await request.body()
+        with INGEST_HANDLER_SECONDS.labels("bulk").time():
+            try:
+                data = VehicleBulkData.model_validate_json(body)
+            except ValidationError as e:
+                INGEST_REJECTED.labels("bulk", "validation").inc()
+                raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+
+            await apply_vehicle_batches(data.batches)
+        INGEST_UPDATES.labels("bulk").inc(len(data.batches))
+        return {"message": "Vehicle data received and distributed.", "batches": len(data.batches)}
+
+    @staticmethod
+    async def ingest_vehicle_data_stream(request: Request):
+        """
+        Long-lived ingest: the detector keeps one chunked HTTP request open and
+        writes one VehicleBatchData JSON object per line (NDJSON). Updates are
+        applied in groups of up to INGEST_BATCH_SIZE lines, so subscribers are
+        notified once per group rather than once per line. A line longer than
+        INGEST_MAX_LINE_BYTES ends the request with 413; the lines before it
+        stay applied.
+        """
+        received = 0
+        rejected = 0
+        pending: List[VehicleBatchData] = []
+        buffer = b""
+
+        async for chunk in request.stream():
+            buffer += chunk
+            lines = buffer.split(b"\n")
+            buffer = lines.pop()  # incomplete last line waits for the next chunk
+            if len(buffer) > INGEST_MAX_LINE_BYTES or any(len(line) > INGEST_MAX_LINE_BYTES for line in lines):
+                INGEST_REJECTED.labels("stream", "too_large").inc()
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Ingest line longer than {INGEST_MAX_LINE_BYTES} bytes, after {received} updates",
+                )
+
+            for line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    pending.append(VehicleBatchData.model_validate_json(line))
+                except ValidationError as e:
+                    rejected += 1
+                    INGEST_REJECTED.labels("stream", "validation").inc()
+                    print(f"[WARN] Rejected ingest line: {e.errors(include_url=False)[0]['msg']}")
+                    continue
+                if len(pending) >= INGEST_BATCH_SIZE:
+                    await apply_vehicle_batches(pending)
+                    INGEST_UPDATES.labels("stream").inc(len(pending))
+                    received += len(pending)
+                    pending = []
+
+            # Don't hold updates back while waiting for the next chunk
+            if pending:
+                await apply_vehicle_batches(pending)
+                INGEST_UPDATES.labels("stream").inc(len(pending))
+                received += len(pending)
+                pending = []
+
+        if buffer.strip():
+            try:
+                await apply_vehicle_batches([VehicleBatchData.model_validate_json(buffer)])
+                INGEST_UPDATES.labels("stream").inc()
+                received += 1
+            except ValidationError:
+                rejected += 1
+                INGEST_REJECTED.labels("stream", "validation").inc()
+
+        return {"message": "Ingest stream closed.", "received": received, "rejected": rejected}
+
+    @staticmethod
+    async def post_detections(data: DetectionBatch = Body(...)):
+        """
+        Receives raw tracked detections and counts them per zone on the server,
+        using the camera's polygons from `Camera.points`. Each track id is
+        counted once per zone it enters. Answers 404 for cameras that aren't
+        configured, and 503 while the camera configuration can't be loaded.
+        """
+        if not camera_config.is_loaded():
+            if not camera_config.claim_retry() or not await asyncio.to_thread(camera_config.load):
+                raise retry_later("Camera configuration unavailable", CAMERA_CONFIG_RETRY_SECONDS)
+        if camera_config.get(data.camera_id) is None:
+            INGEST_REJECTED.labels("detections", "unknown_camera").inc()
+            raise HTTPException(status_code=404, detail="Camera not found")
+
+        with INGEST_HANDLER_SECONDS.labels("detections").time():
+            frame_size = (data.frame_width, data.frame_height) if data.frame_width and data.frame_height else None
+            increments = zone_counter.count(data.camera_id, data.detections, frame_size)
+            if increments:
+                zones = [ZoneData(zone=zone, **counts) for zone, counts in increments.items()]
+                await apply_vehicle_batches([VehicleBatchData(camera_id=data.camera_id, zones=zones, reset_state=False)])
+        INGEST_UPDATES.labels("detections").inc()
+
+        return {"message": "Detections counted.", "counted": increments}
     
     @staticmethod
     async def update_and_get_overview(data: dict = Body(...)):
         """
         Frontend calls this to update the overview data and get chart history.
-        This function handles the snapshot and history logic.
+        Takes the camera's overview snapshot; for a read-only view of several
+        cameras, use /overview or /overview-stream.
         """
         camera_id = data.get("cameraId")
         if not camera_id:
             raise HTTPException(status_code=400, detail="Camera ID is required.")
 
-        # Update overview_data_store with new data
-        overview_data_store[camera_id] = vehicle_data_store.get(camera_id, {}).copy()
+        # Take the overview snapshot, shared with every worker. Chart history
+        # is recorded at ingest, so polling doesn't change it.
+        overview = {zone: dict(counts) for zone, counts in state_backend.counts(camera_id).items()}
+        await state_backend.save_snapshot("overview", camera_id, overview)
 
-        total_motorbikes = sum(z["number_of_motorbike"] for z in overview_data_store[camera_id].values())
-        total_cars = sum(z["number_of_car"] for z in overview_data_store[camera_id].values())
-        
-        if camera_id not in chart_history_store:
-            chart_history_store[camera_id] = []
-        
-        # Add the test logic to see if the final data score should be crushed
-        last_point = chart_history_store[camera_id][-1] if chart_history_store[camera_id] else None
-        current_time_formatted = datetime.now().strftime("%H:%M:%S")
-
-        if last_point and last_point["time"] == current_time_formatted:
-            # If in the same time, update valuable in the final point
-            last_point["motorbikes"] = total_motorbikes
-            last_point["cars"] = total_cars
-        else:
-            # Else add a new point
-            if len(chart_history_store[camera_id]) >= 100:
-                chart_history_store[camera_id].pop(0)
-            
-            chart_history_store[camera_id].append({
-                "time": current_time_formatted,
-                "motorbikes": total_motorbikes,
-                "cars": total_cars,
-            })
-        
         return {
-            "overviewData": overview_data_store.get(camera_id, {}),
-            "chartData": chart_history_store.get(camera_id, [])
+            "overviewData": overview,
+            "chartData": chart_history.latest_points(camera_id),
+            "windowData": window_aggregator.snapshot(camera_id)
         }
         
     @staticmethod
-    async def stream_vehicle_data(camera_id: str, request: Request):
+    async def stream_vehicle_data(camera_id: str, request: Request, mode: str = "full", format: str = "json"):
         """
         SSE endpoint streaming vehicle data updates for given camera_id.
         Sends initial data immediately and pushes new data when notified.
-        """
-        queue = get_update_queue(camera_id)
 
-        async def event_generator():
-            data = vehicle_data_store.get(camera_id, {})
-            yield f"data: {json.dumps(data)}\n\n"
-
-            while True:
-                try:
-                    await asyncio.wait_for(queue.get(), timeout=0.01)
-                except asyncio.TimeoutError:
-                    pass
-
-                if await request.is_disconnected():
-                    print(f"[INFO] Client disconnected from vehicle-data-stream for camera {camera_id}")
-                    break
-
-                data = vehicle_data_store.get(camera_id, {}).copy()
-                yield f"data: {json.dumps(data)}\n\n"
+        mode=full (default) sends the whole `{zone: counts}` dict on every update.
+        mode=delta sends a `snapshot` event, then `delta` events holding only the
+        zones changed since the `base` version; a client whose last version is
+        not `base` should reconnect to resync. On reconnect, EventSource's
+        Last-Event-ID resumes from the last version received.
+        format=compact sends counts as `[number_of_motorbike, number_of_car]`.
+        """
+        if not is_known_camera(camera_id):
+            raise HTTPException(status_code=404, detail="Camera not found")
+        return hub_event_stream(vehicle_data_hub, camera_id, request, mode, format)
 
-        return StreamingResponse(event_generator(), media_type="text/event-stream")
+    @staticmethod
+    async def stream_vehicle_windows(camera_id: str, request: Request, mode: str = "full", format: str = "json"):
+        """
+        SSE endpoint streaming rolling window counts for a camera, as
+        `{zone: {window: counts}}` with the whole camera under "*". Takes the
+        same mode and format options as vehicle-data-stream; format=compact
+        sends each window as `[number_of_motorbike, number_of_car]`.
+        """
+        if not is_known_camera(camera_id):
+            raise HTTPException(status_code=404, detail="Camera not found")
+        return hub_event_stream(vehicle_window_hub, camera_id, request, mode, format, WINDOW_REFRESH_SECONDS)
     
     @staticmethod
-    def get_chart_history(camera_id: str):
+    def get_chart_history(
+        camera_id: str,
+        resolution: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ):
         """
         Returns the historical chart data for a given camera_id.
+
+        Without `resolution`, returns the last 100 per-second points as
+        `chartData`, like the overview page. With `resolution` (second, minute
+        or hour), returns the points within [start, end) as parallel
+        `time` / `motorbikes` / `cars` arrays, with times in epoch seconds.
+        """
+        if resolution is None:
+            return {"camera_id": camera_id, "chartData": chart_history.latest_points(camera_id)}
+        if resolution not in RESOLUTIONS:
+            raise HTTPException(status_code=400, detail=f"resolution must be one of {', '.join(RESOLUTIONS)}")
+
+        data = chart_history.query(
+            camera_id,
+            resolution,
+            start.timestamp() if start else None,
+            end.timestamp() if end else None,
+        )
+        return {"camera_id": camera_id, "resolution": resolution, **data}
+
+    @staticmethod
+    async def get_count_history(
+        camera_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        bucket: str = "minute",
+        session: AsyncSession = Depends(get_async_db)
+    ):
+        """
+        Returns per-zone vehicle counts for a camera from the durable store,
+        summed per `bucket` (second, minute, hour or day) over [start, end).
+        Defaults to the last hour.
         """
-        data = chart_history_store.get(camera_id, [])
-        return {"camera_id": camera_id, "chartData": data}
\ No newline at end of file
+        if bucket not in COUNT_BUCKETS:
+            raise HTTPException(status_code=400, detail=f"bucket must be one of {', '.join(COUNT_BUCKETS)}")
+        end = end or datetime.now(timezone.utc)
+        start = start or end - timedelta(hours=1)
+
+        query = text(
+            """
+            SELECT zone, date_trunc(:bucket, ts) AS bucket_start,
+                   SUM(number_of_motorbike) AS number_of_motorbike,
+                   SUM(number_of_car) AS number_of_car
+            FROM vehicle_count
+            WHERE camera_id = :camera_id AND ts >= :start AND ts < :end
+            GROUP BY zone, bucket_start
+            ORDER BY bucket_start
+            """
+        )
+        result = await session.execute(
+            query, {"bucket": bucket, "camera_id": camera_id, "start": start, "end": end}
+        )
+        rows = result.fetchall()
+
+        data: Dict[str, list] = {}
+        totals: Dict[str, Dict[str, int]] = {}
+        for row in rows:
+            data.setdefault(row.zone, []).append({
+                "time": row.bucket_start.isoformat(),
+                "number_of_motorbike": int(row.number_of_motorbike),
+                "number_of_car": int(row.number_of_car),
+            })
+            zone_totals = totals.setdefault(row.zone, {"number_of_motorbike": 0, "number_of_car": 0})
+            zone_totals["number_of_motorbike"] += int(row.number_of_motorbike)
+            zone_totals["number_of_car"] += int(row.number_of_car)
+
+        return {
+            "camera_id": camera_id,
+            "bucket": bucket,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "data": data,
+            "totals": totals,
+        }
@@ -1,5 +1,6 @@
 
 import config
+import socket
 import uvicorn
 import asyncio
 
@@ -8,24 +9,35 @@ from contextlib import asynccontextmanager
 from apis.base import api_router
 from starlette.middleware.cors import CORSMiddleware
 from services.rtsp_fetcher import rtsp_fetcher
-from apis.v1.route_tracking import reset_counts_periodically
+from services.count_writer import count_writer
+from services.camera_config import camera_config
+from db.session import async_engine
+from services.imaging_executor import imaging_executor
+from services.state_backend import state_backend
+from services.camera_registry import camera_registry
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("[INFO] Starting application")
-    rtsp_fetcher.start()
-    reset_task = asyncio.create_task(reset_counts_periodically())
+    camera_config.load()
+    await state_backend.start()
+    camera_registry.start()
+    if config.COUNT_STORE_ENABLED:
+        count_writer.start()
     yield
-    reset_task.cancel()
-    
-    try:
-        await reset_task
-    except asyncio.CancelledError:
-        pass
 
+    camera_registry.stop()
     rtsp_fetcher.stop()
     print("[INFO] Shutting down RTSP streams")
 
+    if config.COUNT_STORE_ENABLED:
+        count_writer.stop()
+        print("[INFO] Flushed buffered vehicle counts")
+
+    imaging_executor.shutdown()
+    await state_backend.stop()
+    await async_engine.dispose()
+
 
 def add_middleware(app):
     origins = [
@@ -41,6 +53,24 @@ def add_middleware(app):
         allow_headers=["*"],
     )
 
+def listen_socket(host, port):
+    """
+    Listening socket whose connections keep at most SEND_LOWAT_BYTES of unsent
+    data in the kernel. Past that, writes to a slow client wait, which is how
+    MJPEG streams notice the client can't keep up and adapt.
+    """
+    # proto must be IPPROTO_TCP: asyncio only turns on TCP_NODELAY for
+    # accepted sockets that say they are TCP, and without it Nagle's algorithm
+    # holds small responses back for the client's delayed ACK
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    if hasattr(socket, "TCP_NOTSENT_LOWAT"):
+        # Inherited by every accepted connection
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NOTSENT_LOWAT, config.SEND_LOWAT_BYTES)
+    sock.bind((host, port))
+    return sock
+
 def include_router(app):
     app.include_router(api_router)
 
@@ -58,8 +88,14 @@ def start_application():
 app = start_application()
 
 if __name__ == "__main__":
-    uvicorn.run(
-        app,
-        host="0.0.0.0",
-        port=5101
-    )
+    if config.API_WORKERS > 1 and config.FRAME_SOURCE == "shared":
+        # Each worker imports the app itself and reads frames from shared memory
+        uvicorn.run(
+            "app:app",
+            host="0.0.0.0",
+            port=5101,
+            workers=config.API_WORKERS
+        )
+    else:
+        server = uvicorn.Server(uvicorn.Config(app, host="0.0.0.0", port=5101))
+        server.run(sockets=[listen_socket("0.0.0.0", 5101)])
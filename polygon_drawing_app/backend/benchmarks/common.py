@@ -0,0 +1,158 @@
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+import psutil
+
+from config import VIDEO_FPS
+
+# Shared by the benchmark scenarios: a synthetic test video standing in for
+# the cameras, a server subprocess playing it, and result formatting.
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_VIDEO = os.path.join(BACKEND_DIR, "benchmarks", "data", "synthetic.mp4")
+DEFAULT_PORT = 5199
+
+
+def synthetic_video(path=DEFAULT_VIDEO, seconds=10, fps=VIDEO_FPS, width=1280, height=720):
+    """
+    Writes a video of vehicles-sized boxes crossing a textured background,
+    so JPEG sizes and encode times are close to a real street camera.
+    Reuses the file if it already exists.
+    """
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    rng = np.random.default_rng(0)
+    background = rng.integers(60, 140, (height, width, 3), dtype=np.uint8)
+    background = cv2.GaussianBlur(background, (0, 0), 3)
+    boxes = [
+        (rng.integers(0, width), rng.integers(0, height - 80), rng.integers(4, 16), tuple(int(c) for c in rng.integers(0, 255, 3)))
+        for _ in range(12)
+    ]
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    for index in range(int(seconds * fps)):
+        frame = background.copy()
+        for x, y, speed, color in boxes:
+            left = int(x + index * speed) % width
+            cv2.rectangle(frame, (left, int(y)), (left + 120, int(y) + 70), color, -1)
+        cv2.putText(frame, f"{index:05d}", (20, 50), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 3)
+        writer.write(frame)
+    writer.release()
+    print(f"[INFO] Wrote synthetic video {path}")
+    return path
+
+
+def camera_ids(n_cameras):
+    return [f"BENCH{index:03d}" for index in range(n_cameras)]
+
+
+class ServerProcess:
+    """
+    Runs the API in a subprocess (see benchmarks/server.py) with `n_cameras`
+    cameras all playing `video` (the synthetic video by default), so the
+    server's CPU can be measured apart from the load generator's.
+    """
+
+    def __init__(self, n_cameras=1, video=None, port=DEFAULT_PORT, env=None):
+        self.n_cameras = n_cameras
+        self.video = video or (synthetic_video() if n_cameras else None)
+        self.port = port
+        self.env = {**os.environ, "COUNT_STORE_ENABLED": "false", **(env or {})}
+        self.process = None
+        self._cpu_start = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        command = [sys.executable, "-m", "benchmarks.server", "--cameras", str(self.n_cameras), "--port", str(self.port)]
+        if self.video:
+            command += ["--video", self.video]
+        self.process = subprocess.Popen(
+            command,
+            cwd=BACKEND_DIR, env=self.env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Benchmark server exited with code {self.process.returncode}")
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=0.5).close()
+                break
+            except OSError:
+                time.sleep(0.2)
+        else:
+            self.process.kill()
+            raise RuntimeError("Benchmark server did not start within 30s")
+        self.reset_cpu()
+        return self
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+    def _cpu_seconds(self):
+        times = psutil.Process(self.process.pid).cpu_times()
+        return times.user + times.system
+
+    def reset_cpu(self):
+        self._cpu_start = (self._cpu_seconds(), time.monotonic())
+
+    def cpu_percent(self):
+        """Server CPU use since `reset_cpu`, in percent of one core."""
+        cpu, started = self._cpu_start
+        return round((self._cpu_seconds() - cpu) / (time.monotonic() - started) * 100, 1)
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def latency_summary(seconds):
+    """Mean and percentiles of a list of durations, in milliseconds."""
+    if not seconds:
+        return None
+    return {
+        "mean": round(statistics.mean(seconds) * 1000, 2),
+        "p50": round(percentile(seconds, 0.50) * 1000, 2),
+        "p95": round(percentile(seconds, 0.95) * 1000, 2),
+        "p99": round(percentile(seconds, 0.99) * 1000, 2),
+        "max": round(max(seconds) * 1000, 2),
+    }
+
+
+def environment():
+    """Where the benchmark ran, recorded with every result."""
+    revision = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True
+    ).stdout.strip()
+    return {
+        "git_revision": revision or None,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def write_results(path, benchmark, params, results):
+    if not path:
+        return
+    with open(path, "w") as f:
+        json.dump({"benchmark": benchmark, "params": params, "environment": environment(), "results": results}, f, indent=2)
+    print(f"[INFO] Results written to {path}")
@@ -0,0 +1,114 @@
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks.common import ServerProcess, latency_summary, write_results
+
+# Sync vs async database routes, through the whole HTTP stack: the async
+# PUT /camera/{sn} and GET /counts/{sn} routes against their former sync
+# versions (benchmarks/sync_routes.py), at the same concurrency. Meanwhile a
+# probe polls /capture-health, a sync route, to measure how long other
+# threadpool work waits while the database requests are in flight. Needs the
+# database from config.DB_CONNECTION_STRING, with the camera table loaded:
+#   python -m benchmarks.db_sessions --route counts --requests 2000 --concurrency 200 --output db.json
+
+CAMERA_ID = "SN003"
+PROBE = "/api/v1/tracking/capture-health"
+
+ROUTES = {
+    # path of the async route, path of the sync baseline
+    "camera": (f"/api/v1/camera/{CAMERA_ID}", f"/bench/sync/camera/{CAMERA_ID}"),
+    "counts": (f"/api/v1/tracking/counts/{CAMERA_ID}", f"/bench/sync/counts/{CAMERA_ID}"),
+}
+
+
+async def probe_threadpool(client, stop, latencies):
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get(PROBE)
+        if response.status_code == 200:
+            latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.01)
+
+
+async def drive(base_url, route, path, n_requests, concurrency):
+    latencies = []
+    errors = 0
+    next_request = 0
+
+    limits = httpx.Limits(max_connections=concurrency + 1, max_keepalive_connections=concurrency + 1)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        if route == "camera":
+            # Writes the camera's current points back, so the table is left as it was
+            camera = (await client.get(f"/api/v1/camera/{CAMERA_ID}")).json()
+            send = lambda: client.put(path, json={"points": camera["points"]})
+        else:
+            send = lambda: client.get(path)
+
+        async def worker(count):
+            nonlocal next_request, errors
+            while next_request < count:
+                next_request += 1
+                start = time.perf_counter()
+                response = await send()
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors += 1
+
+        # Warm up both connection pools so connection setup isn't measured
+        await asyncio.gather(*(worker(min(concurrency, 50)) for _ in range(min(concurrency, 50))))
+        latencies.clear()
+        next_request = 0
+
+        stop = asyncio.Event()
+        probe_latencies = []
+        probe = asyncio.create_task(probe_threadpool(client, stop, probe_latencies))
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(n_requests) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await probe
+    return latencies, errors, elapsed, probe_latencies
+
+
+def run(args):
+    results = {}
+    with ServerProcess(n_cameras=0, port=args.port) as server:
+        for kind, path in zip(("async", "sync"), ROUTES[args.route]):
+            server.reset_cpu()
+            latencies, errors, elapsed, probe = asyncio.run(
+                drive(server.url, args.route, path, args.requests, args.concurrency)
+            )
+            result = {
+                "path": path,
+                "throughput_rps": round(len(latencies) / elapsed, 1),
+                "errors": errors,
+                "latency_ms": latency_summary(latencies),
+                "threadpool_probe_ms": latency_summary(probe),
+                "server_cpu_percent": server.cpu_percent(),
+            }
+            latency = result["latency_ms"] or {"p50": 0, "p95": 0}
+            probe_summary = result["threadpool_probe_ms"] or {"p95": 0}
+            print(f"[INFO] {args.route} {kind:5s}  {result['throughput_rps']:8.1f} req/s  "
+                  f"p50 {latency['p50']:7.2f} ms  p95 {latency['p95']:7.2f} ms  "
+                  f"probe p95 {probe_summary['p95']:7.2f} ms  errors {errors}")
+            results[kind] = result
+    return results
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Sync vs async database routes")
+    parser.add_argument("--route", choices=sorted(ROUTES), default="counts")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--port", type=int, default=5199)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    result = run(args)
+    write_results(args.output, "db_sessions", {key: value for key, value in vars(args).items() if key != "output"}, result)
@@ -0,0 +1,90 @@
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+
+from benchmarks.common import ServerProcess, camera_ids, latency_summary, write_results
+
+# Ingest throughput of /vehicle-data-batch: `--concurrency` connections post
+# count updates for N cameras with M zones each, as fast as the server answers.
+#   python -m benchmarks.ingest --cameras 50 --zones 4 --requests 20000 --concurrency 32 --output ingest.json
+
+ENDPOINT = "/api/v1/tracking/vehicle-data-batch"
+
+
+def make_payload(camera_id, zones):
+    return {
+        "camera_id": camera_id,
+        "zones": [
+            {"zone": zone, "number_of_motorbike": random.randint(0, 3), "number_of_car": random.randint(0, 2)}
+            for zone in zones
+        ],
+        "reset_state": False,
+    }
+
+
+async def drive(url, cameras, zones, n_requests, concurrency):
+    latencies = []
+    errors = 0
+    next_request = 0
+
+    async def worker(client):
+        nonlocal next_request, errors
+        while next_request < n_requests:
+            camera_id = cameras[next_request % len(cameras)]
+            next_request += 1
+            payload = make_payload(camera_id, zones)
+            start = time.perf_counter()
+            response = await client.post(ENDPOINT, json=payload)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed
+
+
+def run(args):
+    cameras = camera_ids(args.cameras)
+    zones = [f"zone{index}" for index in range(args.zones)]
+    # No video needed: ingest doesn't touch the capture path
+    with ServerProcess(n_cameras=0, port=args.port) as server:
+        asyncio.run(drive(server.url, cameras, zones, min(args.requests, 500), args.concurrency))  # warm up
+        server.reset_cpu()
+        latencies, errors, elapsed = asyncio.run(drive(server.url, cameras, zones, args.requests, args.concurrency))
+        cpu = server.cpu_percent()
+
+    result = {
+        "requests": args.requests,
+        "errors": errors,
+        "throughput_rps": round(args.requests / elapsed, 1),
+        "zone_updates_per_s": round(args.requests * args.zones / elapsed, 1),
+        "latency_ms": latency_summary(latencies),
+        "server_cpu_percent": cpu,
+    }
+    print(f"[INFO] ingest  {result['throughput_rps']:8.1f} req/s  p50 {result['latency_ms']['p50']:7.2f} ms  "
+          f"p99 {result['latency_ms']['p99']:7.2f} ms  server CPU {cpu}%  errors {errors}")
+    return result
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Ingest throughput of /vehicle-data-batch")
+    parser.add_argument("--cameras", type=int, default=20)
+    parser.add_argument("--zones", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--port", type=int, default=5199)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    result = run(args)
+    write_results(args.output, "ingest", {key: value for key, value in vars(args).items() if key != "output"}, result)
@@ -0,0 +1,106 @@
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks.common import ServerProcess, camera_ids, latency_summary, write_results
+
+# MJPEG fan-out of /stream-rtsp: K clients spread over N cameras, each
+# playing the synthetic video. Reports server CPU, frames per second each
+# client receives, time to the first frame and the gaps between frames.
+#   python -m benchmarks.mjpeg_fanout --cameras 4 --clients 40 --duration 20 --output mjpeg.json
+
+BOUNDARY = b"--frame"
+
+
+async def viewer(client, url, duration, stats):
+    start = time.perf_counter()
+    first_frame = None
+    frames = 0
+    received = 0
+    gaps = []
+    last_frame_at = None
+    buffer = b""
+
+    async with client.stream("GET", url) as response:
+        async for chunk in response.aiter_bytes():
+            received += len(chunk)
+            buffer += chunk
+            # Each boundary after the first ends a complete frame
+            parts = buffer.split(BOUNDARY)
+            buffer = parts.pop()
+            for part in parts:
+                if not part:
+                    continue
+                now = time.perf_counter()
+                if first_frame is None:
+                    first_frame = now - start
+                elif last_frame_at is not None:
+                    gaps.append(now - last_frame_at)
+                last_frame_at = now
+                frames += 1
+            if time.perf_counter() - start >= duration:
+                break
+
+    elapsed = time.perf_counter() - start
+    stats.append({"first_frame": first_frame, "fps": frames / elapsed, "bytes": received, "gaps": gaps})
+
+
+async def drive(base_url, cameras, n_clients, duration):
+    stats = []
+    limits = httpx.Limits(max_connections=n_clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        await asyncio.gather(*(
+            viewer(client, f"/api/v1/tracking/stream-rtsp/{cameras[index % len(cameras)]}", duration, stats)
+            for index in range(n_clients)
+        ))
+    return stats
+
+
+def run(args):
+    cameras = camera_ids(args.cameras)
+    with ServerProcess(n_cameras=args.cameras, video=args.video, port=args.port) as server:
+        time.sleep(args.warmup)  # let every camera connect and decode
+        server.reset_cpu()
+        stats = asyncio.run(drive(server.url, cameras, args.clients, args.duration))
+        cpu = server.cpu_percent()
+
+    fps = [client["fps"] for client in stats]
+    first_frames = [client["first_frame"] for client in stats if client["first_frame"] is not None]
+    gaps = [gap for client in stats for gap in client["gaps"]]
+    result = {
+        "cameras": args.cameras,
+        "clients": args.clients,
+        "clients_without_frames": len(stats) - len(first_frames),
+        "fps_per_client": {
+            "mean": round(sum(fps) / len(fps), 2) if fps else 0,
+            "min": round(min(fps), 2) if fps else 0,
+        },
+        "mbit_per_s": round(sum(client["bytes"] for client in stats) * 8 / args.duration / 1e6, 2),
+        "first_frame_ms": latency_summary(first_frames),
+        "frame_gap_ms": latency_summary(gaps),
+        "server_cpu_percent": cpu,
+    }
+    gap = result["frame_gap_ms"] or {"p95": 0}
+    print(f"[INFO] mjpeg   {args.clients} clients / {args.cameras} cameras  "
+          f"{result['fps_per_client']['mean']} fps/client  frame gap p95 {gap['p95']:7.2f} ms  server CPU {cpu}%")
+    return result
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="MJPEG fan-out of /stream-rtsp")
+    parser.add_argument("--cameras", type=int, default=2)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=10, help="seconds each client watches")
+    parser.add_argument("--warmup", type=float, default=3, help="seconds to wait for the cameras before measuring")
+    parser.add_argument("--video", help="video file the cameras play (default: a generated synthetic video)")
+    parser.add_argument("--port", type=int, default=5199)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    result = run(args)
+    write_results(args.output, "mjpeg_fanout", {key: value for key, value in vars(args).items() if key != "output"}, result)
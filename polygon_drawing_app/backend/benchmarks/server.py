@@ -0,0 +1,32 @@
+import argparse
+
+import config
+
+# The API with local video files standing in for the RTMP cameras, started
+# by the benchmarks (see ServerProcess in benchmarks/common.py):
+#   python -m benchmarks.server --cameras 8 --video benchmarks/data/synthetic.mp4
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API server with synthetic camera sources")
+    parser.add_argument("--cameras", type=int, default=1)
+    parser.add_argument("--video", help="video file every camera plays, looped in real time")
+    parser.add_argument("--port", type=int, default=5199)
+    args = parser.parse_args()
+    if args.cameras and not args.video:
+        parser.error("--video is required with cameras")
+
+    from benchmarks.common import camera_ids
+
+    # Must happen before the app (and the capture threads) are imported
+    config.RTMP_STREAMS.clear()
+    config.RTMP_STREAMS.update({camera_id: args.video for camera_id in camera_ids(args.cameras)})
+    config.CAPTURE_SOURCES = "config"
+
+    import uvicorn
+    from app import app, listen_socket
+    from benchmarks.sync_routes import router as sync_router
+
+    app.include_router(sync_router, prefix="/bench/sync")
+
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+    server.run(sockets=[listen_socket("127.0.0.1", args.port)])
@@ -0,0 +1,120 @@
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from benchmarks.common import ServerProcess, latency_summary, write_results
+
+# SSE fan-out latency of /vehicle-data-stream: K clients subscribe to one
+# camera while updates are posted at a fixed rate. Each update adds one
+# motorbike, so the total a client receives tells which update it reflects;
+# latency is from posting that update to the client receiving it (including
+# the hub's SSE_MIN_INTERVAL coalescing).
+#   python -m benchmarks.sse_fanout --clients 500 --rate 50 --duration 20 --output sse.json
+
+CAMERA_ID = "BENCHSSE"
+ZONE = "bench"
+
+
+async def subscriber(client, url, sent_at, latencies, ready, stop):
+    async with client.stream("GET", url) as response:
+        ready.release()
+        async for line in response.aiter_lines():
+            if stop.is_set():
+                break
+            if not line.startswith("data:"):
+                continue
+            received = time.perf_counter()
+            counts = json.loads(line[5:]).get(ZONE)
+            if counts is None:
+                continue
+            posted = sent_at.get(counts["number_of_motorbike"])
+            if posted is not None:
+                latencies.append(received - posted)
+
+
+async def publisher(client, rate, duration, sent_at):
+    total = 0
+    interval = 1 / rate
+    next_at = time.perf_counter()
+    deadline = next_at + duration
+    while next_at < deadline:
+        total += 1
+        sent_at[total] = time.perf_counter()
+        await client.post("/api/v1/tracking/vehicle-data-batch", json={
+            "camera_id": CAMERA_ID,
+            "zones": [{"zone": ZONE, "number_of_motorbike": 1, "number_of_car": 0}],
+            "reset_state": False,
+        })
+        next_at += interval
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+    return total
+
+
+async def drive(base_url, n_clients, rate, duration):
+    sent_at = {}
+    latencies = []
+    ready = asyncio.Semaphore(0)
+    stop = asyncio.Event()
+    url = f"/api/v1/tracking/vehicle-data-stream/{CAMERA_ID}"
+
+    limits = httpx.Limits(max_connections=n_clients + 8)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=None) as client:
+        # Streams of cameras the server knows nothing about are refused
+        await client.post("/api/v1/tracking/vehicle-data-batch", json={
+            "camera_id": CAMERA_ID,
+            "zones": [{"zone": ZONE, "number_of_motorbike": 0, "number_of_car": 0}],
+            "reset_state": False,
+        })
+        tasks = [
+            asyncio.create_task(subscriber(client, url, sent_at, latencies, ready, stop))
+            for _ in range(n_clients)
+        ]
+        for _ in range(n_clients):
+            await ready.acquire()
+
+        updates = await publisher(client, rate, duration, sent_at)
+        await asyncio.sleep(1)  # let the last updates arrive
+        stop.set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return updates, latencies
+
+
+def run(args):
+    with ServerProcess(n_cameras=0, port=args.port) as server:
+        server.reset_cpu()
+        updates, latencies = asyncio.run(drive(server.url, args.clients, args.rate, args.duration))
+        cpu = server.cpu_percent()
+
+    result = {
+        "clients": args.clients,
+        "updates": updates,
+        "messages_received": len(latencies),
+        "messages_per_client": round(len(latencies) / args.clients, 1) if args.clients else 0,
+        "latency_ms": latency_summary(latencies),
+        "server_cpu_percent": cpu,
+    }
+    summary = result["latency_ms"] or {"p50": 0, "p99": 0}
+    print(f"[INFO] sse     {args.clients} clients  {result['messages_per_client']} msgs/client  "
+          f"p50 {summary['p50']:7.2f} ms  p99 {summary['p99']:7.2f} ms  server CPU {cpu}%")
+    return result
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="SSE fan-out latency of /vehicle-data-stream")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=20, help="updates posted per second")
+    parser.add_argument("--duration", type=float, default=10, help="seconds of publishing")
+    parser.add_argument("--port", type=int, default=5199)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    result = run(args)
+    write_results(args.output, "sse_fanout", {key: value for key, value in vars(args).items() if key != "output"}, result)
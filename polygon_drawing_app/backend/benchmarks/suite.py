@@ -0,0 +1,41 @@
+import argparse
+import json
+
+from benchmarks import ingest, mjpeg_fanout, sse_fanout
+from benchmarks.common import environment
+
+# Runs every load scenario with its default parameters (or the ones given
+# here) and writes one JSON file, to compare hot-path changes before deploying:
+#   python -m benchmarks.suite --output before.json
+#   python -m benchmarks.suite --output after.json
+
+SCENARIOS = {
+    "ingest": ingest,
+    "sse_fanout": sse_fanout,
+    "mjpeg_fanout": mjpeg_fanout,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the ingest, SSE and MJPEG benchmarks")
+    parser.add_argument("--only", choices=sorted(SCENARIOS), action="append", help="run only these scenarios")
+    parser.add_argument("--quick", action="store_true", help="short runs, to check the suite works")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    quick = {
+        "ingest": ["--requests", "2000"],
+        "sse_fanout": ["--clients", "50", "--duration", "3"],
+        "mjpeg_fanout": ["--clients", "4", "--duration", "3"],
+    }
+    results = {}
+    for name, scenario in SCENARIOS.items():
+        if args.only and name not in args.only:
+            continue
+        scenario_args = scenario.build_parser().parse_args(quick[name] if args.quick else [])
+        params = {key: value for key, value in vars(scenario_args).items() if key != "output"}
+        results[name] = {"params": params, "results": scenario.run(scenario_args)}
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"benchmark": "suite", "environment": environment(), "scenarios": results}, f, indent=2)
+        print(f"[INFO] Results written to {args.output}")
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from apis.v1.route_tracking import COUNT_BUCKETS
+from db.models import Camera
+from db.session import get_db
+from schemas.camera import CameraUpdatePoints
+from services.camera_config import camera_config
+
+# The camera update and /counts routes as they were before they moved to the
+# async engine: sync `def` routes holding a threadpool worker for the whole
+# database round trip. Mounted by benchmarks/server.py under /bench/sync, as
+# the baseline the db_sessions benchmark compares the real routes against.
+
+router = APIRouter()
+
+
+def update_camera(serial_number: str, item: CameraUpdatePoints, session: Session = Depends(get_db)):
+    db_item = session.query(Camera).filter(Camera.serial_number == serial_number).first()
+    if db_item is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+
+    for key, value in item.model_dump(exclude_unset=True).items():
+        setattr(db_item, key, value)
+
+    session.add(db_item)
+    session.commit()
+    session.refresh(db_item)
+
+    camera_config.update(db_item)
+    return db_item
+
+
+def get_count_history(
+    camera_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    bucket: str = "minute",
+    session: Session = Depends(get_db)
+):
+    if bucket not in COUNT_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"bucket must be one of {', '.join(COUNT_BUCKETS)}")
+    end = end or datetime.now(timezone.utc)
+    start = start or end - timedelta(hours=1)
+
+    rows = session.execute(
+        text(
+            """
+            SELECT zone, date_trunc(:bucket, ts) AS bucket_start,
+                   SUM(number_of_motorbike) AS number_of_motorbike,
+                   SUM(number_of_car) AS number_of_car
+            FROM vehicle_count
+            WHERE camera_id = :camera_id AND ts >= :start AND ts < :end
+            GROUP BY zone, bucket_start
+            ORDER BY bucket_start
+            """
+        ),
+        {"bucket": bucket, "camera_id": camera_id, "start": start, "end": end},
+    ).fetchall()
+
+    data: Dict[str, list] = {}
+    totals: Dict[str, Dict[str, int]] = {}
+    for row in rows:
+        data.setdefault(row.zone, []).append({
+            "time": row.bucket_start.isoformat(),
+            "number_of_motorbike": int(row.number_of_motorbike),
+            "number_of_car": int(row.number_of_car),
+        })
+        zone_totals = totals.setdefault(row.zone, {"number_of_motorbike": 0, "number_of_car": 0})
+        zone_totals["number_of_motorbike"] += int(row.number_of_motorbike)
+        zone_totals["number_of_car"] += int(row.number_of_car)
+
+    return {
+        "camera_id": camera_id,
+        "bucket": bucket,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "data": data,
+        "totals": totals,
+    }
+
+
+router.add_api_route("/camera/{serial_number}", update_camera, methods=["PUT"])
+router.add_api_route("/counts/{camera_id}", get_count_history, methods=["GET"])
@@ -0,0 +1,35 @@
+import signal
+import threading
+
+import config
+from services.rtsp_fetcher import RTSPFrameFetcherCV
+from services.capture_supervisor import CaptureSupervisor
+from services.camera_config import camera_config
+from services.camera_registry import CameraRegistry
+
+# Runs camera capture in its own process and publishes decoded frames to
+# shared memory. Start the API with FRAME_SOURCE=shared to read from it:
+#   python capture.py
+#   FRAME_SOURCE=shared API_WORKERS=4 python app.py
+# Set CAPTURE_WORKERS to spread the cameras over several capture processes.
+# Cameras are taken from the camera table and followed as it changes (see
+# CAPTURE_SOURCES); the API process does the same to find the cameras' rings.
+
+if __name__ == "__main__":
+    stop_event = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+
+    if config.CAPTURE_WORKERS > 1:
+        fetcher = CaptureSupervisor(config.CAPTURE_WORKERS)
+    else:
+        fetcher = RTSPFrameFetcherCV(shared_memory=True)
+    registry = CameraRegistry(fetcher)
+    if config.CAPTURE_SOURCES == "database":
+        camera_config.load()
+    print("[INFO] Starting shared-memory capture")
+    registry.start()
+    stop_event.wait()
+    registry.stop()
+    fetcher.stop()
+    print("[INFO] Shared-memory capture stopped")
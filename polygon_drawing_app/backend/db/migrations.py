@@ -0,0 +1,45 @@
+import threading
+
+from sqlalchemy import text
+
+from db.session import engine
+
+# Schema changes made after init_db.sql was first applied. Each statement must
+# be idempotent: they run on every start against whatever schema exists.
+MIGRATIONS = (
+    "ALTER TABLE camera ADD COLUMN IF NOT EXISTS stream_url TEXT",
+    """
+    CREATE TABLE IF NOT EXISTS vehicle_count (
+        id BIGSERIAL PRIMARY KEY,
+        camera_id VARCHAR(50) NOT NULL,
+        zone TEXT NOT NULL,
+        ts TIMESTAMPTZ NOT NULL,
+        number_of_motorbike INTEGER NOT NULL DEFAULT 0,
+        number_of_car INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_vehicle_count_camera_ts ON vehicle_count (camera_id, ts)",
+)
+
+_applied = False
+_lock = threading.Lock()
+
+
+def ensure_schema() -> bool:
+    """
+    Applies MIGRATIONS once per process. Blocking; returns whether the schema
+    is up to date, so callers can retry when the database was unreachable.
+    """
+    global _applied
+    with _lock:
+        if _applied:
+            return True
+        try:
+            with engine.begin() as connection:
+                for statement in MIGRATIONS:
+                    connection.execute(text(statement))
+        except Exception as e:
+            print(f"[WARN] Could not apply schema migrations: {getattr(e, 'orig', e)}")
+            return False
+        _applied = True
+        return True
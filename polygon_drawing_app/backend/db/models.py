@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String
 from sqlalchemy.orm import as_declarative, declared_attr
 from sqlalchemy.dialects.postgresql import JSONB
 
@@ -27,4 +27,19 @@ class Camera(Base):
     serial_number = Column(String, index=True)
     name = Column(String, index=True)
     points = Column(JSONB, nullable=True)
+    # Capture source (RTSP/RTMP URL); RTMP_STREAMS is used when empty
+    stream_url = Column(String, nullable=True)
 
+class VehicleCount(Base):
+    """Vehicles counted in one zone during one second (time-series)."""
+    __tablename__ = "vehicle_count"
+    id = Column(BigInteger, primary_key=True)
+    camera_id = Column(String, nullable=False)
+    zone = Column(String, nullable=False)
+    ts = Column(DateTime(timezone=True), nullable=False)
+    number_of_motorbike = Column(Integer, nullable=False, default=0)
+    number_of_car = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_vehicle_count_camera_ts", "camera_id", "ts"),
+    )
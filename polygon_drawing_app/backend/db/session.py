@@ -1,15 +1,36 @@
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 import config
 
 SQLALCHEMY_DATABASE_URL = config.DB_CONNECTION_STRING
-engine = create_engine(SQLALCHEMY_DATABASE_URL, pool_pre_ping=True)
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    pool_pre_ping=True,
+    pool_size=config.DB_POOL_SIZE,
+    max_overflow=config.DB_MAX_OVERFLOW,
+    pool_recycle=config.DB_POOL_RECYCLE,
+    pool_timeout=config.DB_POOL_TIMEOUT,
+)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async path (asyncpg): DB-backed routes await queries on the event loop
+# instead of holding a threadpool worker for the whole round trip
+async_engine = create_async_engine(
+    config.DB_ASYNC_CONNECTION_STRING,
+    pool_pre_ping=True,
+    pool_size=config.DB_POOL_SIZE,
+    max_overflow=config.DB_MAX_OVERFLOW,
+    pool_recycle=config.DB_POOL_RECYCLE,
+    pool_timeout=config.DB_POOL_TIMEOUT,
+)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 
 def get_db() -> Generator:
     """Yields a database session."""
@@ -21,3 +42,9 @@ def get_db() -> Generator:
         raise e
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Yields an async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -2,21 +2,36 @@ CREATE TABLE camera (
     id uuid PRIMARY KEY,
     serial_number VARCHAR(50),
     name TEXT NOT NULL,
-    points JSONB
+    points JSONB,
+    -- Capture source; added to existing databases on startup (db/migrations.py)
+    stream_url TEXT
 );
 
 -- ✅ Cập nhật dữ liệu INSERT theo cấu trúc mới
-INSERT INTO camera (id, serial_number, name, points)
+INSERT INTO camera (id, serial_number, name, points, stream_url)
 VALUES (
     'a4251b14-70bc-4513-8475-86f5baf5ba5c',
     'SN003',
     'NguyenOanh-PhanVanTri-01',
-    '[{"zone0": [366, 299, 446, 370, 6, 574, 3, 436]}, {"zone1": [600, 212, 762, 217, 697, 275, 549, 230]}]'::jsonb
+    '[{"zone0": [366, 299, 446, 370, 6, 574, 3, 436]}, {"zone1": [600, 212, 762, 217, 697, 275, 549, 230]}]'::jsonb,
+    'rtmp://localhost:1935/app/stream1?tcp'
 );
-INSERT INTO camera (id, serial_number, name, points)
+INSERT INTO camera (id, serial_number, name, points, stream_url)
 VALUES (
     '106cf7d9-398f-40c9-9c18-7e9b9669df8a',
     'SN004',
     'NguyenOanh-PhanVanTri-02',
-    '[{"zone0": [679, 202, 919, 185, 942, 298, 640, 288]}, {"zone1": [509, 194, 647, 192, 582, 288, 417, 235]}]'::jsonb
-);
\ No newline at end of file
+    '[{"zone0": [679, 202, 919, 185, 942, 298, 640, 288]}, {"zone1": [509, 194, 647, 192, 582, 288, 417, 235]}]'::jsonb,
+    'rtmp://localhost:1935/app/stream2?tcp'
+);
+
+-- Time-series of vehicle counts, one row per camera, zone and second
+CREATE TABLE vehicle_count (
+    id BIGSERIAL PRIMARY KEY,
+    camera_id VARCHAR(50) NOT NULL,
+    zone TEXT NOT NULL,
+    ts TIMESTAMPTZ NOT NULL,
+    number_of_motorbike INTEGER NOT NULL DEFAULT 0,
+    number_of_car INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX ix_vehicle_count_camera_ts ON vehicle_count (camera_id, ts);
@@ -2,10 +2,22 @@ CREATE TABLE camera (
     id uuid PRIMARY KEY,
     serial_number VARCHAR(50),
     name TEXT NOT NULL,
-    points JSONB NOT NULL
+    points JSONB NOT NULL,
+    stream_url TEXT
 );
 
 INSERT INTO camera (id, serial_number, name, points)
 VALUES ('04dfb5ed-1bf8-477e-bd4a-00d637f4cdd7', 'MCT-2.1', 'Mai Chí Thọ - Nguyễn Cơ Thạch - 1', '[]'::jsonb);
 INSERT INTO camera (id, serial_number, name, points)
-VALUES ('a7891234-7136-44f4-8db8-95267137334b', 'MCT-2.2', 'Mai Chí Thọ - Nguyễn Cơ Thạch - 2', '[]'::jsonb);
\ No newline at end of file
+VALUES ('a7891234-7136-44f4-8db8-95267137334b', 'MCT-2.2', 'Mai Chí Thọ - Nguyễn Cơ Thạch - 2', '[]'::jsonb);
+
+-- Time-series of vehicle counts, one row per camera, zone and second
+CREATE TABLE vehicle_count (
+    id BIGSERIAL PRIMARY KEY,
+    camera_id VARCHAR(50) NOT NULL,
+    zone TEXT NOT NULL,
+    ts TIMESTAMPTZ NOT NULL,
+    number_of_motorbike INTEGER NOT NULL DEFAULT 0,
+    number_of_car INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX ix_vehicle_count_camera_ts ON vehicle_count (camera_id, ts);
@@ -15,7 +15,10 @@ class CameraCreate(CameraBase):
     pass
 
 class CameraShow(CameraBase):
-    image: Optional[str]
+    image_url: Optional[str]
 
 class CameraUpdatePoints(BaseModel):
-    points: List[Dict[str, Any]]
\ No newline at end of file
+    points: List[Dict[str, Any]]
+
+class CameraUpdateStream(BaseModel):
+    stream_url: Optional[str]
\ No newline at end of file
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import List, Optional, Union
 
 class ZoneData(BaseModel):
     zone: str
@@ -9,4 +9,19 @@ class ZoneData(BaseModel):
 class VehicleBatchData(BaseModel):
     camera_id: str
     zones: List[ZoneData]
-    reset_state: bool
\ No newline at end of file
+    reset_state: bool
+
+class VehicleBulkData(BaseModel):
+    batches: List[VehicleBatchData]
+
+class Detection(BaseModel):
+    bbox: List[float] = Field(..., min_length=4, max_length=4)  # x1, y1, x2, y2 in pixels
+    cls: Union[int, str]
+    track_id: int
+
+class DetectionBatch(BaseModel):
+    camera_id: str
+    detections: List[Detection]
+    # Size of the frame the boxes refer to, when it differs from the editor canvas the zones were drawn on
+    frame_width: Optional[int] = None
+    frame_height: Optional[int] = None
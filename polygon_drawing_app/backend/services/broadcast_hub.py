@@ -0,0 +1,181 @@
+import asyncio
+import itertools
+import json
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+from config import SSE_MIN_INTERVAL
+
+STREAM_MODES = ("full", "delta")
+STREAM_FORMATS = ("json", "compact")
+
+
+class _Channel:
+    def __init__(self, epoch: str):
+        self.epoch = epoch  # versions are only comparable within an epoch
+        self.version = 0
+        self.snapshot: Optional[dict] = None  # frozen copy taken at the last flush
+        self.key_versions: Dict[str, int] = {}  # version at which each key last changed
+        self.dirty: Set[str] = set()
+        self.dirty_all = False
+        self.encoded: Dict[tuple, str] = {}  # messages already serialized for this version
+        self.changed = asyncio.Event()
+        self.last_flush = 0.0
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+
+
+class BroadcastHub:
+    """
+    Fans out per-camera snapshots to any number of SSE clients.
+
+    Publishers only mark a camera (and optionally which of its keys) as changed.
+    At most once per `min_interval` the hub takes a snapshot and bumps the
+    camera's version; bursts of publishes between flushes are coalesced.
+    Each message a client can ask for (full snapshot, or delta from the
+    previous version, in each format) is serialized at most once per version
+    and shared by every client. `name` labels the hub's clients in metrics.
+
+    Versions restart from 0 whenever a channel is created, in every process,
+    so each channel also has an epoch unique to this hub instance and
+    creation; event ids carry both as `<epoch>:<version>`.
+    """
+
+    def __init__(self, snapshot: Callable[[str], dict], compact_item: Callable[[Any], Any] = None,
+                 min_interval: float = SSE_MIN_INTERVAL, name: str = "sse"):
+        self.snapshot = snapshot
+        self.name = name
+        self.compact_item = compact_item or (lambda value: value)
+        self.min_interval = min_interval
+        self._channels: Dict[str, _Channel] = {}
+        self._instance = uuid.uuid4().hex[:8]
+        self._created = itertools.count(1)
+
+    def _channel(self, camera_id: str) -> _Channel:
+        if camera_id not in self._channels:
+            self._channels[camera_id] = _Channel(f"{self._instance}.{next(self._created)}")
+        return self._channels[camera_id]
+
+    def _freeze(self, camera_id: str) -> dict:
+        # Copy so messages encoded later still describe the version they belong to
+        live = self.snapshot(camera_id)
+        return {key: dict(value) if isinstance(value, dict) else value for key, value in live.items()}
+
+    def _flush(self, camera_id: str):
+        channel = self._channel(camera_id)
+        channel.flush_handle = None
+        channel.last_flush = time.monotonic()
+        channel.version += 1
+        channel.snapshot = self._freeze(camera_id)
+        channel.encoded = {}
+
+        changed = channel.snapshot.keys() if channel.dirty_all else channel.dirty & channel.snapshot.keys()
+        for key in changed:
+            channel.key_versions[key] = channel.version
+        channel.dirty = set()
+        channel.dirty_all = False
+
+        # Wake everyone waiting on the old version, then start a new generation
+        channel.changed.set()
+        channel.changed = asyncio.Event()
+
+    def publish(self, camera_id: str, keys: Optional[Iterable[str]] = None):
+        """
+        Marks a camera as changed; `keys` limits the change to some of its
+        snapshot keys (zones). Must be called from the event loop.
+        """
+        channel = self._channel(camera_id)
+        if keys is None:
+            channel.dirty_all = True
+        else:
+            channel.dirty.update(keys)
+        if channel.flush_handle is not None:
+            return
+        delay = channel.last_flush + self.min_interval - time.monotonic()
+        loop = asyncio.get_running_loop()
+        channel.flush_handle = loop.call_later(max(0.0, delay), self._flush, camera_id)
+
+    def discard(self, camera_id: str):
+        """Forgets a camera nobody is subscribed to; it restarts from version 0."""
+        channel = self._channels.pop(camera_id, None)
+        if channel is not None and channel.flush_handle is not None:
+            channel.flush_handle.cancel()
+
+    def version(self, camera_id: str) -> int:
+        return self._channel(camera_id).version
+
+    def resume_version(self, camera_id: str, last_event_id: str) -> Optional[int]:
+        """
+        The version a client's Last-Event-ID refers to, if it belongs to the
+        camera's current epoch; None means the client must start from a snapshot.
+        """
+        epoch, _, version = last_event_id.rpartition(":")
+        channel = self._channels.get(camera_id)
+        if channel is None or epoch != channel.epoch or not version.isdigit():
+            return None
+        version = int(version)
+        return version if version <= channel.version else None
+
+    def message(self, camera_id: str, mode: str = "full", fmt: str = "json", since: Optional[int] = None) -> str:
+        """
+        Returns the SSE message for the camera's current version.
+
+        "full" mode sends the bare snapshot as unnamed `data:` events.
+        "delta" mode sends a `snapshot` event, then `delta` events holding only
+        the keys changed since version `since`; both carry `<epoch>:<version>`
+        as the event id, and deltas name the version they apply to as `base`.
+        """
+        channel = self._channel(camera_id)
+        if channel.snapshot is None:
+            channel.snapshot = self._freeze(camera_id)
+
+        if mode == "delta" and since is not None and since < channel.version:
+            kind, base = "delta", since
+        elif mode == "delta":
+            kind, base = "snapshot", None
+        else:
+            kind, base = "full", None
+
+        # Clients that keep up all ask for the same delta, so share it
+        cache_key = (kind, fmt, base)
+        cacheable = base is None or base == channel.version - 1
+        if cacheable and cache_key in channel.encoded:
+            return channel.encoded[cache_key]
+
+        if kind == "delta":
+            items = {key: channel.snapshot[key] for key, version in channel.key_versions.items()
+                     if version > base and key in channel.snapshot}
+        else:
+            items = channel.snapshot
+
+        if kind == "full":
+            if fmt == "compact":
+                items = {key: self.compact_item(value) for key, value in items.items()}
+            text = f"data: {json.dumps(items)}\n\n"
+        else:
+            if fmt == "compact":
+                body = {"v": channel.version, "z": {key: self.compact_item(value) for key, value in items.items()}}
+                if base is not None:
+                    body["b"] = base
+            else:
+                body = {"version": channel.version, "zones": items}
+                if base is not None:
+                    body["base"] = base
+            text = f"id: {channel.epoch}:{channel.version}\nevent: {kind}\ndata: {json.dumps(body, separators=(',', ':'))}\n\n"
+
+        if cacheable:
+            channel.encoded[cache_key] = text
+        return text
+
+    async def wait(self, camera_id: str, version: int, timeout: float) -> Optional[int]:
+        """
+        Waits until the camera has a version newer than `version`.
+        Returns the new version, or None if the timeout expires first.
+        """
+        channel = self._channel(camera_id)
+        if channel.version <= version:
+            try:
+                await asyncio.wait_for(channel.changed.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return None
+        return channel.version
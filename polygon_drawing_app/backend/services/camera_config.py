@@ -0,0 +1,139 @@
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from db.migrations import ensure_schema
+from db.models import Camera
+from db.session import SessionLocal
+from config import CAMERA_CONFIG_RETRY_SECONDS
+
+
+def parse_zone_points(points) -> List[Tuple[str, List[float]]]:
+    """
+    Flattens `Camera.points` into (zone name, [x1, y1, x2, y2, ...]) pairs.
+    Accepts both the stored list of single-zone objects and a plain dict.
+    """
+    if not points:
+        return []
+    if isinstance(points, dict):
+        points = [points]
+    zones = []
+    for zone_obj in points:
+        for name, coords in zone_obj.items():
+            if coords and len(coords) >= 6:
+                zones.append((name, coords))
+    return zones
+
+
+class CameraEntry:
+    """A cached `Camera` row with its zones already parsed. Treat as read-only."""
+
+    def __init__(self, camera: Camera, version: int):
+        self.id = camera.id
+        self.serial_number = camera.serial_number
+        self.name = camera.name
+        self.points = camera.points
+        self.stream_url = camera.stream_url
+        self.zones = parse_zone_points(camera.points)
+        self.version = version  # config version at which this camera last changed
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "serial_number": self.serial_number,
+            "name": self.name,
+            "points": self.points,
+            "stream_url": self.stream_url,
+        }
+
+
+class CameraConfigCache:
+    """
+    Process-wide cache of the camera table, keyed by serial number.
+
+    Loaded once at startup; `update` must be called with the row after every
+    committed change, so reads never go to the database. `version` is bumped
+    on every change, and each entry records the version it last changed at,
+    so other components can tell when to rebuild what they derived from it.
+    Writers replace the whole mapping, so readers never need the lock.
+    """
+
+    def __init__(self):
+        self._cameras: Dict[str, CameraEntry] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._next_retry = 0.0
+        self.version = 0
+
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    def claim_retry(self) -> bool:
+        """
+        Whether a request may try to load the unloaded cache now. At most one
+        caller per CAMERA_CONFIG_RETRY_SECONDS gets True, so a database outage
+        doesn't turn every request into a connection attempt.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._loaded or now < self._next_retry:
+                return False
+            self._next_retry = now + CAMERA_CONFIG_RETRY_SECONDS
+            return True
+
+    def ensure_loaded(self) -> bool:
+        """Loads the cache if it isn't yet and a retry is due. Blocking; returns whether it is loaded."""
+        if self._loaded:
+            return True
+        return self.claim_retry() and self.load()
+
+    def load(self):
+        """(Re)loads every camera from the database. Blocking; returns whether it succeeded."""
+        if not ensure_schema():
+            return False
+        session = SessionLocal()
+        try:
+            rows = session.query(Camera).all()
+        except Exception as e:
+            print(f"[WARN] Could not load camera configuration: {getattr(e, 'orig', e)}")
+            return False
+        finally:
+            session.close()
+
+        with self._lock:
+            self.version += 1
+            previous = self._cameras
+            cameras = {}
+            for row in rows:
+                entry = CameraEntry(row, self.version)
+                old = previous.get(row.serial_number)
+                if old is not None and old.to_dict() == entry.to_dict():
+                    entry.version = old.version  # unchanged, keep derived state valid
+                cameras[row.serial_number] = entry
+            self._cameras = cameras
+            self._loaded = True
+        print(f"[INFO] Loaded configuration of {len(rows)} cameras")
+        return True
+
+    def update(self, camera: Camera):
+        """Write-through: stores a camera row just committed to the database."""
+        with self._lock:
+            self.version += 1
+            self._cameras = {**self._cameras, camera.serial_number: CameraEntry(camera, self.version)}
+
+    def remove(self, serial_number: str):
+        with self._lock:
+            if serial_number in self._cameras:
+                self.version += 1
+                self._cameras = {key: entry for key, entry in self._cameras.items() if key != serial_number}
+
+    def get(self, serial_number: str) -> Optional[CameraEntry]:
+        return self._cameras.get(serial_number)
+
+    def all(self) -> List[CameraEntry]:
+        """Every camera, ordered by name."""
+        return sorted(self._cameras.values(), key=lambda entry: entry.name or "")
+
+
+# Singleton instance
+camera_config = CameraConfigCache()
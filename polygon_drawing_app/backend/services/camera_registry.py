@@ -0,0 +1,75 @@
+import threading
+
+from config import RTMP_STREAMS, CAPTURE_SOURCES, CAMERA_RECONCILE_INTERVAL
+from services.camera_config import camera_config
+from services.rtsp_fetcher import rtsp_fetcher
+
+
+class CameraRegistry:
+    """
+    Keeps the cameras being captured in line with the camera table.
+
+    Each camera row is captured from its `stream_url`, or from RTMP_STREAMS
+    by serial number when it has none; rows with neither aren't captured.
+    `reconcile` re-reads the table and hands the result to the fetcher, which
+    starts new cameras, stops removed ones and reconnects only the cameras
+    whose source changed. It runs every CAMERA_RECONCILE_INTERVAL seconds and
+    whenever a camera's source is changed through the API.
+    """
+
+    def __init__(self, fetcher, interval=CAMERA_RECONCILE_INTERVAL):
+        self.fetcher = fetcher
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def desired_streams(self):
+        """`{camera_id: source}` of every camera that should be captured."""
+        if CAPTURE_SOURCES == "config" or not camera_config.is_loaded():
+            return dict(RTMP_STREAMS)
+        streams = {}
+        for entry in camera_config.all():
+            source = entry.stream_url or RTMP_STREAMS.get(entry.serial_number)
+            if source:
+                streams[entry.serial_number] = source
+        return streams
+
+    def reconcile(self, reload=True):
+        """
+        Applies the camera table to the fetcher. Blocking; returns the cameras
+        added, removed and restarted. With `reload`, the table is re-read from
+        the database first (the cached one is used if that fails).
+        """
+        if reload and CAPTURE_SOURCES == "database":
+            camera_config.load()
+        with self._lock:
+            changes = self.fetcher.update_streams(self.desired_streams())
+        if any(changes.values()):
+            print(f"[INFO] Capture streams reconciled: {changes}")
+        return changes
+
+    def _reconcile_loop(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.reconcile()
+            except Exception as e:
+                print(f"[WARN] Camera reconcile failed: {e}")
+
+    def start(self):
+        with self._lock:
+            self.fetcher.start(self.desired_streams())
+        if CAPTURE_SOURCES == "database" and self.interval > 0:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._reconcile_loop, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+# Singleton instance
+camera_registry = CameraRegistry(rtsp_fetcher)
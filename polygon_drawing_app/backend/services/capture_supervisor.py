@@ -0,0 +1,281 @@
+import multiprocessing
+import queue
+import threading
+import time
+
+from config import (
+    RTMP_STREAMS, CAPTURE_WORKERS, CAPTURE_HEALTH_INTERVAL, CAPTURE_RESTART_BACKOFF, CAPTURE_STABLE_SECONDS,
+    FRAME_RING_SLOTS, FRAME_RING_MAX_WIDTH, FRAME_RING_MAX_HEIGHT,
+)
+from services.frame_ring import SharedFrameRing
+
+
+def stream_changes(previous, streams):
+    """The cameras added, removed and restarted (source changed) going from one stream list to another."""
+    return {
+        "added": sorted(streams.keys() - previous.keys()),
+        "removed": sorted(previous.keys() - streams.keys()),
+        "restarted": sorted(camera_id for camera_id in streams.keys() & previous.keys()
+                            if streams[camera_id] != previous[camera_id]),
+    }
+
+
+def run_capture_worker(worker_id, streams, command_queue, health_queue, stop_event, report_interval):
+    """
+    Entry point of a capture worker process. Captures its share of the cameras
+    into shared memory and reports their health until told to stop. Once a
+    removed camera's thread has stopped writing its ring, says so with a
+    "removed" message, so the camera can be handed to another worker.
+    """
+    from services.rtsp_fetcher import RTSPFrameFetcherCV
+
+    # The supervisor owns the rings, so they outlive this process
+    fetcher = RTSPFrameFetcherCV(shared_memory=True, owns_rings=False)
+    fetcher.start(streams)
+
+    while not stop_event.is_set():
+        try:
+            command, camera_id, rtsp_url = command_queue.get(timeout=report_interval)
+            if command == "add":
+                fetcher.add_camera(camera_id, rtsp_url)
+            elif command == "remove":
+                fetcher.remove_camera(camera_id)
+                health_queue.put((worker_id, "removed", camera_id))
+        except queue.Empty:
+            pass
+        health_queue.put((worker_id, "health", fetcher.get_health()))
+
+    fetcher.stop()
+
+
+class CaptureWorker:
+    """Bookkeeping for one capture process and the cameras assigned to it."""
+
+    def __init__(self, worker_id):
+        self.worker_id = worker_id
+        self.streams = {}
+        self.process = None
+        self.command_queue = None
+        self.stop_event = None
+        self.restarts = 0
+        self.crashes = 0  # consecutive crashes, sets the restart backoff
+        self.started_at = 0.0
+        self.next_restart_at = 0.0
+
+
+class CaptureSupervisor:
+    """
+    Spreads cameras across a pool of capture processes, several cameras per
+    process. Restarts crashed workers with backoff, rebalances cameras when the
+    stream list changes and collects per-camera health for the API process.
+    Frames reach the API through the shared-memory rings (SharedFrameReader).
+
+    A ring must only ever have one writer, so a camera leaving a worker is
+    only started elsewhere once that worker confirms it stopped capturing it
+    (or has died); until then the camera is in `_handoffs`.
+    """
+
+    def __init__(self, n_workers=CAPTURE_WORKERS, report_interval=CAPTURE_HEALTH_INTERVAL):
+        self.n_workers = max(1, n_workers)
+        self.report_interval = report_interval
+        self._ctx = multiprocessing.get_context("spawn")
+        self._health_queue = self._ctx.Queue()
+        self._workers = [CaptureWorker(i) for i in range(self.n_workers)]
+        self._rings = {}
+        self._health = {}  # camera_id -> last reported status
+        self._handoffs = {}  # camera_id -> worker yet to confirm it stopped capturing it
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._monitor = None
+
+    def _assign_worker(self):
+        return min(self._workers, key=lambda worker: len(worker.streams))
+
+    def _ensure_ring(self, camera_id):
+        # The supervisor owns the rings so they survive worker restarts
+        if camera_id not in self._rings:
+            self._rings[camera_id] = SharedFrameRing.open(
+                camera_id, FRAME_RING_SLOTS, FRAME_RING_MAX_WIDTH, FRAME_RING_MAX_HEIGHT
+            )
+
+    def _owner(self, camera_id):
+        for worker in self._workers:
+            if camera_id in worker.streams:
+                return worker
+        return None
+
+    def _release(self, worker, camera_id):
+        """Stops a camera on a worker; it can't start elsewhere until the worker confirms."""
+        if worker.process is not None and worker.process.is_alive():
+            self._handoffs[camera_id] = worker
+            self._send(worker, "remove", camera_id)
+
+    def _claim(self, worker, camera_id, rtsp_url):
+        """Starts a camera on a worker, or leaves it to _finish_handoff if it is still being released."""
+        worker.streams[camera_id] = rtsp_url
+        if camera_id not in self._handoffs:
+            self._send(worker, "add", camera_id, rtsp_url)
+
+    def _finish_handoff(self, camera_id):
+        self._handoffs.pop(camera_id, None)
+        owner = self._owner(camera_id)
+        if owner is not None:
+            self._send(owner, "add", camera_id, owner.streams[camera_id])
+
+    def _spawn(self, worker):
+        worker.command_queue = self._ctx.Queue()
+        worker.stop_event = self._ctx.Event()
+        worker.started_at = time.monotonic()
+        # Cameras still being released elsewhere are added when that completes
+        streams = {camera_id: url for camera_id, url in worker.streams.items() if camera_id not in self._handoffs}
+        worker.process = self._ctx.Process(
+            target=run_capture_worker,
+            args=(
+                worker.worker_id, streams, worker.command_queue,
+                self._health_queue, worker.stop_event, self.report_interval,
+            ),
+            name=f"capture-worker-{worker.worker_id}",
+            daemon=True,
+        )
+        worker.process.start()
+        print(f"[INFO] Capture worker {worker.worker_id} started (pid {worker.process.pid}) "
+              f"with {len(worker.streams)} cameras")
+
+    def _send(self, worker, command, camera_id, rtsp_url=None):
+        if worker.process is not None and worker.process.is_alive():
+            worker.command_queue.put((command, camera_id, rtsp_url))
+
+    def start(self, streams=None):
+        streams = RTMP_STREAMS if streams is None else streams
+        with self._lock:
+            for camera_id, rtsp_url in streams.items():
+                self._ensure_ring(camera_id)
+                self._assign_worker().streams[camera_id] = rtsp_url
+            for worker in self._workers:
+                self._spawn(worker)
+        self._monitor = threading.Thread(target=self._monitor_loop, daemon=True)
+        self._monitor.start()
+
+    def stop(self):
+        self._stopping.set()
+        for worker in self._workers:
+            if worker.stop_event is not None:
+                worker.stop_event.set()
+        for worker in self._workers:
+            if worker.process is not None:
+                worker.process.join(timeout=10)
+                if worker.process.is_alive():
+                    worker.process.terminate()
+        if self._monitor is not None:
+            self._monitor.join(timeout=self.report_interval * 2)
+        for ring in self._rings.values():
+            ring.close()
+        self._rings.clear()
+        print("[INFO] All capture workers stopped")
+
+    def update_streams(self, streams):
+        """
+        Adds and removes cameras without touching cameras whose source is
+        unchanged, then rebalances so worker loads differ by at most one.
+        Returns the cameras added, removed and restarted.
+        """
+        with self._lock:
+            previous = {
+                camera_id: rtsp_url for worker in self._workers for camera_id, rtsp_url in worker.streams.items()
+            }
+            for worker in self._workers:
+                for camera_id, rtsp_url in list(worker.streams.items()):
+                    if streams.get(camera_id) != rtsp_url:
+                        del worker.streams[camera_id]
+                        self._health.pop(camera_id, None)
+                        self._release(worker, camera_id)
+
+            assigned = {camera_id for worker in self._workers for camera_id in worker.streams}
+            for camera_id, rtsp_url in streams.items():
+                if camera_id not in assigned:
+                    self._ensure_ring(camera_id)
+                    self._claim(self._assign_worker(), camera_id, rtsp_url)
+
+            for camera_id in list(self._rings):
+                if camera_id not in streams:
+                    self._rings.pop(camera_id).close()
+
+            self._rebalance()
+        return stream_changes(previous, streams)
+
+    def _rebalance(self):
+        while True:
+            busiest = max(self._workers, key=lambda worker: len(worker.streams))
+            idlest = min(self._workers, key=lambda worker: len(worker.streams))
+            if len(busiest.streams) - len(idlest.streams) <= 1:
+                return
+            camera_id, rtsp_url = busiest.streams.popitem()
+            self._release(busiest, camera_id)
+            self._claim(idlest, camera_id, rtsp_url)
+            print(f"[{camera_id}] Moved from capture worker {busiest.worker_id} to {idlest.worker_id}")
+
+    def _drain_health(self):
+        while True:
+            try:
+                worker_id, kind, payload = self._health_queue.get_nowait()
+            except queue.Empty:
+                return
+            worker = self._workers[worker_id]
+            if kind == "removed":
+                with self._lock:
+                    if self._handoffs.get(payload) is worker:
+                        self._finish_handoff(payload)
+                continue
+            for camera_id, status in payload.items():
+                if camera_id in worker.streams:
+                    self._health[camera_id] = dict(status, worker=worker_id, reported_at=time.time())
+
+    def _monitor_loop(self):
+        while not self._stopping.wait(self.report_interval):
+            self._drain_health()
+            with self._lock:
+                # A dead worker no longer writes the rings it was releasing
+                for camera_id, worker in list(self._handoffs.items()):
+                    if worker.process is None or not worker.process.is_alive():
+                        self._finish_handoff(camera_id)
+
+                for worker in self._workers:
+                    now = time.monotonic()
+                    if worker.process is None:
+                        continue
+                    if worker.process.is_alive():
+                        if worker.crashes and now - worker.started_at >= CAPTURE_STABLE_SECONDS:
+                            worker.crashes = 0
+                        continue
+                    if now < worker.next_restart_at:
+                        continue
+                    worker.restarts += 1
+                    worker.crashes += 1
+                    # Back off exponentially if the worker keeps crashing
+                    worker.next_restart_at = now + min(CAPTURE_RESTART_BACKOFF * 2 ** worker.crashes, 60)
+                    print(f"[WARN] Capture worker {worker.worker_id} exited with code "
+                          f"{worker.process.exitcode}, restarting")
+                    self._spawn(worker)
+
+    def get_health(self):
+        """Per-camera capture status merged with the state of its worker process."""
+        now = time.time()
+        health = {}
+        with self._lock:
+            for worker in self._workers:
+                worker_alive = worker.process is not None and worker.process.is_alive()
+                for camera_id in worker.streams:
+                    status = dict(self._health.get(camera_id, {"alive": False, "seq": 0, "frame_age": None}))
+                    reported_at = status.pop("reported_at", None)
+                    status.update(
+                        worker=worker.worker_id,
+                        pid=worker.process.pid if worker.process else None,
+                        worker_alive=worker_alive,
+                        worker_restarts=worker.restarts,
+                    )
+                    if not worker_alive:
+                        status["alive"] = False
+                    if reported_at is not None:
+                        status["report_age"] = round(now - reported_at, 3)
+                    health[camera_id] = status
+        return health
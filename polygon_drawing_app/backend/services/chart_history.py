@@ -0,0 +1,124 @@
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from config import CHART_SECOND_POINTS, CHART_MINUTE_POINTS, CHART_HOUR_POINTS
+
+RESOLUTIONS = {"second": 1, "minute": 60, "hour": 3600}
+
+
+class _Tier:
+    """Fixed-capacity ring of (bucket start, motorbikes, cars) points at one resolution."""
+
+    def __init__(self, step: int, capacity: int):
+        self.step = step
+        self.capacity = capacity
+        self.times = np.zeros(capacity, dtype=np.int64)
+        self.values = np.zeros((capacity, 2), dtype=np.int64)
+        self.count = 0  # points ever written; the ring holds the last `capacity`
+
+    def record(self, timestamp: int, utc_offset: int, motorbikes: int, cars: int):
+        # Buckets start on local minutes and hours, like the labels shown for them
+        bucket = timestamp - (timestamp + utc_offset) % self.step
+        last = (self.count - 1) % self.capacity
+        if self.count and self.times[last] == bucket:
+            # Totals are cumulative, so a bucket keeps its latest value
+            index = last
+        elif self.count and self.times[last] > bucket:
+            return
+        else:
+            index = self.count % self.capacity
+            self.count += 1
+        self.times[index] = bucket
+        self.values[index] = (motorbikes, cars)
+
+    def ordered(self):
+        """Returns (times, values) oldest first, without the unused part of the ring."""
+        if self.count <= self.capacity:
+            return self.times[:self.count], self.values[:self.count]
+        split = self.count % self.capacity
+        return (
+            np.concatenate((self.times[split:], self.times[:split])),
+            np.concatenate((self.values[split:], self.values[:split])),
+        )
+
+
+class ChartHistory:
+    """
+    Per-camera history of total motorbike and car counts, kept in NumPy ring
+    buffers at three resolutions. Every sample updates the per-second,
+    per-minute and per-hour tiers, so a whole day can be served at minute
+    resolution without storing or sending every second. Buckets are aligned
+    to the server's local time, the clock `latest_points` labels use, so
+    hourly points start on local hours in zones with non-hour offsets too.
+    """
+
+    def __init__(self, retention: Optional[Dict[str, int]] = None):
+        self.retention = retention or {
+            "second": CHART_SECOND_POINTS,
+            "minute": CHART_MINUTE_POINTS,
+            "hour": CHART_HOUR_POINTS,
+        }
+        self._cameras: Dict[str, Dict[str, _Tier]] = {}
+        self._lock = threading.Lock()
+
+    def _tiers(self, camera_id: str) -> Dict[str, _Tier]:
+        if camera_id not in self._cameras:
+            self._cameras[camera_id] = {
+                name: _Tier(step, self.retention[name]) for name, step in RESOLUTIONS.items()
+            }
+        return self._cameras[camera_id]
+
+    def record(self, camera_id: str, motorbikes: int, cars: int, timestamp: Optional[float] = None):
+        second = int(timestamp if timestamp is not None else time.time())
+        utc_offset = time.localtime(second).tm_gmtoff
+        with self._lock:
+            for tier in self._tiers(camera_id).values():
+                tier.record(second, utc_offset, motorbikes, cars)
+
+    def query(self, camera_id: str, resolution: str = "second",
+              start: Optional[float] = None, end: Optional[float] = None):
+        """
+        Returns the points of one resolution within [start, end) as parallel
+        arrays: `{"time": [...], "motorbikes": [...], "cars": [...]}`, with
+        times in epoch seconds.
+        """
+        with self._lock:
+            if camera_id not in self._cameras:
+                times, values = np.empty(0, dtype=np.int64), np.empty((0, 2), dtype=np.int64)
+            else:
+                times, values = self._cameras[camera_id][resolution].ordered()
+                times, values = times.copy(), values.copy()
+
+        mask = np.ones(len(times), dtype=bool)
+        if start is not None:
+            mask &= times >= start
+        if end is not None:
+            mask &= times < end
+        times, values = times[mask], values[mask]
+        return {
+            "time": times.tolist(),
+            "motorbikes": values[:, 0].tolist(),
+            "cars": values[:, 1].tolist(),
+        }
+
+    def latest_points(self, camera_id: str, limit: int = 100):
+        """
+        Returns the last `limit` per-second points in the dashboard's chart
+        format: `[{"time": "HH:MM:SS", "motorbikes": n, "cars": n}, ...]`.
+        """
+        with self._lock:
+            if camera_id not in self._cameras:
+                return []
+            times, values = self._cameras[camera_id]["second"].ordered()
+            times, values = times[-limit:].copy(), values[-limit:].copy()
+        return [
+            {"time": time.strftime("%H:%M:%S", time.localtime(t)), "motorbikes": m, "cars": c}
+            for t, (m, c) in zip(times.tolist(), values.tolist())
+        ]
+
+
+# Singleton instance
+chart_history = ChartHistory()
@@ -0,0 +1,142 @@
+import csv
+import io
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Tuple
+
+from sqlalchemy import insert
+
+from config import COUNT_FLUSH_SIZE, COUNT_FLUSH_INTERVAL, COUNT_BUFFER_MAX
+from db.migrations import ensure_schema
+from db.models import VehicleCount
+from db.session import engine
+
+COPY_SQL = (
+    "COPY vehicle_count (camera_id, zone, ts, number_of_motorbike, number_of_car) "
+    "FROM STDIN WITH (FORMAT csv)"
+)
+
+
+class CountWriter:
+    """
+    Buffers vehicle count increments in memory and writes them to the
+    `vehicle_count` table in bulk from a background thread.
+
+    Increments for the same camera, zone and second are merged while
+    buffered, so a busy zone adds about one row per second, not one per update.
+    The buffer is flushed when it reaches COUNT_FLUSH_SIZE rows or every
+    COUNT_FLUSH_INTERVAL seconds, whichever comes first; `record` only takes
+    a lock, so ingestion never waits for the database.
+    """
+
+    def __init__(self, flush_size=COUNT_FLUSH_SIZE, flush_interval=COUNT_FLUSH_INTERVAL, max_rows=COUNT_BUFFER_MAX):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_rows = max_rows
+        self._buffer: Dict[Tuple[str, str, int], list] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def record(self, camera_id: str, zone: str, motorbikes: int, cars: int, timestamp: float = None):
+        second = int(timestamp if timestamp is not None else time.time())
+        key = (camera_id, zone, second)
+        with self._lock:
+            counts = self._buffer.get(key)
+            if counts is None:
+                if len(self._buffer) >= self.max_rows:
+                    # Database unreachable for a long time: drop rather than grow without bound
+                    self._buffer.pop(next(iter(self._buffer)))
+                counts = self._buffer[key] = [0, 0]
+            counts[0] += motorbikes
+            counts[1] += cars
+            if len(self._buffer) >= self.flush_size:
+                self._wakeup.set()
+
+    def pending(self) -> int:
+        """Rows buffered and not yet written."""
+        return len(self._buffer)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="count-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        self.flush()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._buffer:
+                return
+            rows, self._buffer = self._buffer, {}
+
+        try:
+            # The table may be missing if the database predates the count store
+            ensure_schema()
+            self._write(rows)
+        except Exception as e:
+            # `orig` is the driver error, without the (very long) statement parameters
+            print(f"[WARN] Failed to write {len(rows)} vehicle count rows, will retry: {getattr(e, 'orig', e)}")
+            # Put the rows back ahead of whatever arrived in the meantime, so
+            # the oldest rows stay first in line to be dropped, as in `record`
+            with self._lock:
+                for key, (motorbikes, cars) in self._buffer.items():
+                    counts = rows.setdefault(key, [0, 0])
+                    counts[0] += motorbikes
+                    counts[1] += cars
+                self._buffer = rows
+                excess = len(rows) - self.max_rows
+                for _ in range(max(0, excess)):
+                    self._buffer.pop(next(iter(self._buffer)))
+            if excess > 0:
+                print(f"[WARN] Vehicle count buffer full, dropped the {excess} oldest rows")
+
+    @staticmethod
+    def _write(rows: Dict[Tuple[str, str, int], list]):
+        connection = engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            if hasattr(cursor, "copy_expert"):
+                # psycopg2: stream the rows with COPY, the fastest bulk path
+                data = io.StringIO()
+                writer = csv.writer(data)
+                for (camera_id, zone, second), (motorbikes, cars) in rows.items():
+                    ts = datetime.fromtimestamp(second, tz=timezone.utc).isoformat()
+                    writer.writerow((camera_id, zone, ts, motorbikes, cars))
+                data.seek(0)
+                cursor.copy_expert(COPY_SQL, data)
+                connection.commit()
+                return
+        finally:
+            connection.close()
+
+        # Other drivers: one multi-row INSERT
+        with engine.begin() as conn:
+            conn.execute(insert(VehicleCount), [
+                {
+                    "camera_id": camera_id,
+                    "zone": zone,
+                    "ts": datetime.fromtimestamp(second, tz=timezone.utc),
+                    "number_of_motorbike": motorbikes,
+                    "number_of_car": cars,
+                }
+                for (camera_id, zone, second), (motorbikes, cars) in rows.items()
+            ])
+
+
+# Singleton instance
+count_writer = CountWriter()
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+import cv2
+from config import MJPEG_LEVELS
+from services.rtsp_fetcher import rtsp_fetcher
+from services.imaging_executor import imaging_executor
+from services.metrics import FRAME_RESIZE_SECONDS, FRAME_ENCODE_SECONDS
+
+
+class FrameEncoder:
+    """
+    Encodes the latest frame of each camera to JPEG once per quality level
+    and shares the bytes with every MJPEG stream and snapshot request for
+    that camera and level. Level 0 is the full STREAM_WIDTH x STREAM_HEIGHT
+    at JPEG_QUALITY; higher levels are the smaller, cheaper MJPEG_LEVELS.
+
+    Async callers use `get_jpeg_async`, which answers cache hits on the event
+    loop and shares one executor job among everyone asking for the same
+    frame, so executor load grows with cameras and levels, not viewers.
+    """
+
+    def __init__(self, fetcher, levels=MJPEG_LEVELS, executor=imaging_executor):
+        self.fetcher = fetcher
+        self.executor = executor
+        self.levels = [
+            (width, height, [int(cv2.IMWRITE_JPEG_QUALITY), quality]) for width, height, quality in levels
+        ]
+        self._cache = {}  # (camera_id, level) -> (frame seq, jpeg bytes)
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._in_flight = {}  # (camera_id, level, frame seq) -> asyncio.Future, on the event loop
+
+    def _get_lock(self, key):
+        with self._locks_guard:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    def encode(self, frame, level=0):
+        width, height, encode_param = self.levels[level]
+        with FRAME_RESIZE_SECONDS.labels(level).time():
+            resized_frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_LINEAR)
+        with FRAME_ENCODE_SECONDS.labels(level).time():
+            success, buffer_jpeg = cv2.imencode('.jpg', resized_frame, encode_param)
+        if not success:
+            return None
+        return buffer_jpeg.tobytes()
+
+    def get_jpeg(self, camera_id, packet, level=0):
+        """
+        Returns the JPEG bytes for a captured frame at a quality level,
+        encoding it only if no other client has done so already.
+        """
+        key = (camera_id, level)
+        with self._get_lock(key):
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == packet.seq:
+                return cached[1]
+
+            jpeg_bytes = self.encode(packet.image, level)
+            if not self.fetcher.is_frame_intact(camera_id, packet):
+                # The shared-memory slot was reused while we were encoding it
+                return None
+            if jpeg_bytes is not None:
+                self._cache[key] = (packet.seq, jpeg_bytes)
+            return jpeg_bytes
+
+    def _encode_done(self, key, future):
+        self._in_flight.pop(key, None)
+        if not future.cancelled():
+            future.exception()  # retrieved, even if every waiter has gone
+
+    async def get_jpeg_async(self, camera_id, packet, level=0):
+        """
+        `get_jpeg` from the event loop. Raises ImagingBusy when the executor
+        is full, for every caller waiting on that encode.
+        """
+        cached = self._cache.get((camera_id, level))
+        if cached is not None and cached[0] == packet.seq:
+            return cached[1]
+
+        key = (camera_id, level, packet.seq)
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self.executor.run(self.get_jpeg, camera_id, packet, level))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._encode_done(key, done))
+        # A viewer that disconnects must not cancel the encode for the others
+        return await asyncio.shield(future)
+
+    def get_latest_jpeg(self, camera_id, level=0):
+        packet = self.fetcher.get_latest_packet(camera_id)
+        if packet is None:
+            return None
+        return self.get_jpeg(camera_id, packet, level)
+
+
+# Singleton instance
+frame_encoder = FrameEncoder(rtsp_fetcher)
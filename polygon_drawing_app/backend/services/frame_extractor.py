@@ -0,0 +1,202 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import cv2
+
+from config import FRAME_CACHE_SIZE, THUMBNAIL_CACHE_DIR, THUMBNAIL_CACHE_MAX_BYTES
+
+
+class _VideoIndex:
+    """What we learned about a video file the first time we opened it."""
+
+    def __init__(self, frame_count: int, seekable: bool):
+        self.frame_count = frame_count
+        self.seekable = seekable
+
+
+class FrameExtractor:
+    """
+    Extracts single frames from video files as JPEG bytes.
+
+    Each file is probed once per mtime: its frame count, and whether seeking
+    with CAP_PROP_POS_FRAMES lands on the requested frame. FFmpeg seeks to the
+    keyframe before the target and decodes only from there, so a frame costs
+    at most one GOP of decoding instead of everything before it. Files that
+    don't seek accurately fall back to decoding from the start.
+
+    Encoded frames are cached in memory (LRU, `cache_size` entries) and on
+    disk under `cache_dir`, keyed by file path, mtime and frame number, so
+    they survive restarts and are invalidated when the file changes. The disk
+    cache is LRU too: a hit touches the file's mtime, and once the files add
+    up to more than `disk_max_bytes` the least recently used are deleted.
+    """
+
+    def __init__(self, cache_dir: str = THUMBNAIL_CACHE_DIR, cache_size: int = FRAME_CACHE_SIZE,
+                 disk_max_bytes: int = THUMBNAIL_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.cache_size = cache_size
+        self.disk_max_bytes = disk_max_bytes
+        self._disk_bytes: Optional[int] = None  # running total, counted on the first write
+        self._memory: "OrderedDict[Tuple[str, int, int], bytes]" = OrderedDict()
+        self._indexes: Dict[Tuple[str, int], _VideoIndex] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(video_path: str, frame_number: int) -> Optional[Tuple[str, int, int]]:
+        try:
+            mtime = os.stat(video_path).st_mtime_ns
+        except OSError:
+            return None
+        return os.path.abspath(video_path), mtime, frame_number
+
+    def _disk_path(self, key: Tuple[str, int, int]) -> str:
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.jpg")
+
+    def etag(self, video_path: str, frame_number: int) -> Optional[str]:
+        """A strong ETag for the frame, which changes when the file does. None if the file doesn't exist."""
+        key = self._key(video_path, frame_number)
+        if key is None:
+            return None
+        return f'"{hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:20]}"'
+
+    def _remember(self, key, jpeg: bytes):
+        with self._lock:
+            self._memory[key] = jpeg
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.cache_size:
+                self._memory.popitem(last=False)
+
+    def _scan_disk(self):
+        """(mtime, size, path) of every cached file."""
+        files = []
+        try:
+            entries = list(os.scandir(self.cache_dir))
+        except OSError:
+            return files
+        for entry in entries:
+            if not entry.name.endswith(".jpg"):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue  # evicted meanwhile
+            files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return files
+
+    def _stored(self, size: int):
+        """Accounts for a file written to the disk cache, evicting old ones past the limit."""
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(file_size for _, file_size, _ in self._scan_disk())
+            else:
+                self._disk_bytes += size
+            if self._disk_bytes <= self.disk_max_bytes:
+                return
+            # Evict down to 90% of the limit, so this doesn't rescan on every write
+            files = sorted(self._scan_disk())
+            total = sum(file_size for _, file_size, _ in files)
+            target = self.disk_max_bytes * 0.9
+            evicted = 0
+            for _, file_size, path in files:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= file_size
+                evicted += 1
+            self._disk_bytes = total
+        print(f"[INFO] Evicted {evicted} thumbnails from the disk cache")
+
+    def _index(self, cap, video_path: str, mtime: int) -> _VideoIndex:
+        index = self._indexes.get((video_path, mtime))
+        if index is not None:
+            return index
+
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        probe = frame_count // 2
+        seekable = False
+        if probe > 0 and cap.set(cv2.CAP_PROP_POS_FRAMES, probe) and cap.grab():
+            # The position is recomputed from the decoded frame's timestamp
+            seekable = int(cap.get(cv2.CAP_PROP_POS_FRAMES)) == probe + 1
+        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+        index = _VideoIndex(frame_count, seekable)
+        with self._lock:
+            self._indexes[(video_path, mtime)] = index
+        if not seekable:
+            print(f"[WARN] {video_path} is not accurately seekable, frames will be decoded from the start")
+        return index
+
+    def _decode(self, video_path: str, mtime: int, frame_number: int):
+        cap = cv2.VideoCapture(video_path)
+        try:
+            if not cap.isOpened():
+                return None
+            index = self._index(cap, video_path, mtime)
+            if 0 < index.frame_count <= frame_number:
+                return None
+
+            if index.seekable:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+            else:
+                for _ in range(frame_number):
+                    if not cap.grab():
+                        return None
+            ret, frame = cap.read()
+            return frame if ret else None
+        finally:
+            cap.release()
+
+    def get_jpeg(self, video_path: str, frame_number: int) -> Optional[bytes]:
+        """Returns the frame as JPEG bytes, or None if the file or frame doesn't exist."""
+        key = self._key(video_path, frame_number)
+        if key is None:
+            return None
+
+        with self._lock:
+            jpeg = self._memory.get(key)
+            if jpeg is not None:
+                self._memory.move_to_end(key)
+                return jpeg
+
+        disk_path = self._disk_path(key)
+        try:
+            with open(disk_path, "rb") as f:
+                jpeg = f.read()
+            os.utime(disk_path)  # recently used, evict last
+        except OSError:
+            jpeg = None
+        if jpeg is not None:
+            self._remember(key, jpeg)
+            return jpeg
+
+        frame = self._decode(key[0], key[1], frame_number)
+        if frame is None:
+            return None
+        ok, buffer = cv2.imencode(".jpg", frame)
+        if not ok:
+            return None
+        jpeg = buffer.tobytes()
+        self._remember(key, jpeg)
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write then rename, so a concurrent reader never sees half a file
+            tmp_path = f"{disk_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(jpeg)
+            os.replace(tmp_path, disk_path)
+            self._stored(len(jpeg))
+        except OSError as e:
+            print(f"[WARN] Could not write thumbnail cache {disk_path}: {e}")
+        return jpeg
+
+
+# Singleton instance
+frame_extractor = FrameExtractor()
@@ -0,0 +1,181 @@
+import struct
+import cv2
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+
+# Header: magic, slot count, bytes per slot, latest sequence, latest timestamp,
+# the time until which some reader wants frames decoded, connection status
+# and reconnect count
+HEADER_FORMAT = "<4sIQQddII"
+HEADER_SIZE = 64
+MAGIC = b"PFR1"
+
+# Slot header: sequence, timestamp, height, width, channels
+SLOT_HEADER_FORMAT = "<QdIII"
+SLOT_HEADER_SIZE = 32
+
+# Offsets of the header fields that change on every write
+LATEST_OFFSET = struct.calcsize("<4sIQ")
+DEMAND_OFFSET = struct.calcsize("<4sIQQd")
+STATUS_OFFSET = struct.calcsize("<4sIQQdd")
+
+
+def ring_name(camera_id):
+    return f"polygonits_{camera_id}"
+
+
+class SharedFrameRing:
+    """
+    Fixed-size ring of frame slots in a multiprocessing.shared_memory block.
+
+    One capture process writes each decoded frame into the next slot and then
+    publishes its sequence number in the header. Any number of processes can
+    attach and read the latest slot as a numpy view, without copying.
+    A reader must call `is_intact` after using a view: with few slots, a slow
+    reader can see its slot overwritten by a newer frame.
+    """
+
+    def __init__(self, shm, owner):
+        self._shm = shm
+        self.owner = owner
+        magic, self.n_slots, self.slot_bytes, *_ = struct.unpack_from(HEADER_FORMAT, shm.buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Shared memory block {shm.name} is not a frame ring")
+        self.slot_stride = SLOT_HEADER_SIZE + self.slot_bytes
+        self.max_height = None
+        self.max_width = None
+
+    @classmethod
+    def create(cls, camera_id, n_slots, max_width, max_height, channels=3):
+        """Creates the ring for a camera, replacing any block left by a crashed writer."""
+        name = ring_name(camera_id)
+        slot_bytes = max_width * max_height * channels
+        size = HEADER_SIZE + n_slots * (SLOT_HEADER_SIZE + slot_bytes)
+        try:
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        shm.buf[:HEADER_SIZE] = bytes(HEADER_SIZE)
+        struct.pack_into(HEADER_FORMAT, shm.buf, 0, MAGIC, n_slots, slot_bytes, 0, 0.0, 0.0, 0, 0)
+        ring = cls(shm, owner=True)
+        ring.max_width = max_width
+        ring.max_height = max_height
+        return ring
+
+    @classmethod
+    def open(cls, camera_id, n_slots, max_width, max_height, channels=3, owner=True):
+        """
+        Opens a camera's ring for writing, reusing an existing block with the
+        same geometry so readers stay attached when a capture worker restarts.
+        The owner unlinks the block on close, including one it reused (left
+        over by a crash, say); pass owner=False from a writer whose block is
+        owned by another process, like capture workers under the supervisor.
+        """
+        try:
+            ring = cls.attach(camera_id)
+        except (FileNotFoundError, ValueError):
+            return cls.create(camera_id, n_slots, max_width, max_height, channels)
+        if ring.n_slots != n_slots or ring.slot_bytes != max_width * max_height * channels:
+            ring.close()
+            return cls.create(camera_id, n_slots, max_width, max_height, channels)
+        if owner:
+            ring.owner = True
+            # attach unregistered it; track it again so it is cleaned up if we crash
+            resource_tracker.register(ring._shm._name, "shared_memory")
+        ring.max_width = max_width
+        ring.max_height = max_height
+        return ring
+
+    @classmethod
+    def attach(cls, camera_id):
+        """Attaches to an existing ring. Raises FileNotFoundError if no writer created it yet."""
+        shm = shared_memory.SharedMemory(name=ring_name(camera_id))
+        # Readers must not unlink the block when they exit; only the writer owns it.
+        # https://github.com/python/cpython/issues/82300
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return cls(shm, owner=False)
+
+    def _slot_offset(self, seq):
+        return HEADER_SIZE + (seq % self.n_slots) * self.slot_stride
+
+    def latest(self):
+        """Returns (sequence, timestamp) of the newest published frame."""
+        return struct.unpack_from("<Qd", self._shm.buf, LATEST_OFFSET)
+
+    def demand_until(self):
+        return struct.unpack_from("<d", self._shm.buf, DEMAND_OFFSET)[0]
+
+    def request_frames(self, until):
+        """Asks the writer to keep decoding frames until the given wall-clock time."""
+        if until > self.demand_until():
+            struct.pack_into("<d", self._shm.buf, DEMAND_OFFSET, until)
+
+    def status(self):
+        """Returns (connected, reconnect count) as last set by the writer."""
+        connected, reconnects = struct.unpack_from("<II", self._shm.buf, STATUS_OFFSET)
+        return bool(connected), reconnects
+
+    def set_status(self, connected, reconnects):
+        struct.pack_into("<II", self._shm.buf, STATUS_OFFSET, int(connected), reconnects)
+
+    def write(self, frame, timestamp):
+        """Copies a frame into the next slot and publishes it. Returns the new sequence number."""
+        height, width = frame.shape[:2]
+        if frame.nbytes > self.slot_bytes:
+            scale = min(self.max_width / width, self.max_height / height)
+            frame = cv2.resize(frame, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+            height, width = frame.shape[:2]
+        channels = frame.shape[2] if frame.ndim == 3 else 1
+
+        seq = self.latest()[0] + 1
+        offset = self._slot_offset(seq)
+
+        # Mark the slot as being written so readers never accept a torn frame
+        struct.pack_into("<Q", self._shm.buf, offset, 0)
+        data_offset = offset + SLOT_HEADER_SIZE
+        target = np.ndarray((height, width, channels), dtype=np.uint8, buffer=self._shm.buf, offset=data_offset)
+        target[...] = frame.reshape(height, width, channels)
+        struct.pack_into(SLOT_HEADER_FORMAT, self._shm.buf, offset, seq, timestamp, height, width, channels)
+        struct.pack_into("<Qd", self._shm.buf, LATEST_OFFSET, seq, timestamp)
+        return seq
+
+    def read_latest(self):
+        """
+        Returns (image view, sequence, timestamp) of the newest frame,
+        or None if nothing has been published yet.
+        """
+        seq, _ = self.latest()
+        if seq == 0:
+            return None
+        offset = self._slot_offset(seq)
+        slot_seq, timestamp, height, width, channels = struct.unpack_from(SLOT_HEADER_FORMAT, self._shm.buf, offset)
+        if slot_seq != seq:
+            # The writer lapped us between the two reads
+            return None
+        image = np.ndarray((height, width, channels), dtype=np.uint8, buffer=self._shm.buf, offset=offset + SLOT_HEADER_SIZE)
+        return image, seq, timestamp
+
+    def is_intact(self, seq):
+        """True while the slot holding `seq` has not been overwritten."""
+        return struct.unpack_from("<Q", self._shm.buf, self._slot_offset(seq))[0] == seq
+
+    def close(self):
+        try:
+            self._shm.close()
+        except BufferError:
+            # A numpy view handed out by read_latest is still alive
+            pass
+        if self.owner:
+            try:
+                # Attached readers in this process tree may have unregistered
+                # the block from the shared resource tracker (see attach)
+                resource_tracker.register(self._shm._name, "shared_memory")
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
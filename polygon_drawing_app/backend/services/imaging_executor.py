@@ -0,0 +1,91 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from config import IMAGING_WORKERS, IMAGING_QUEUE_LIMIT
+
+
+class ImagingBusy(Exception):
+    """Raised when the imaging queue is full; the request should be retried later."""
+
+
+class ImagingExecutor:
+    """
+    Thread pool reserved for CPU-bound imaging work (resize, JPEG encode,
+    video decode), separate from Starlette's threadpool so that a burst of
+    image requests can't starve the rest of the API.
+
+    At most `queue_limit` jobs may wait for a free worker; `submit` raises
+    ImagingBusy beyond that instead of queueing without bound. Queue depth
+    and how long jobs waited for a worker are reported by `stats`.
+    """
+
+    def __init__(self, workers=IMAGING_WORKERS, queue_limit=IMAGING_QUEUE_LIMIT):
+        self.workers = max(1, workers)
+        self.queue_limit = queue_limit
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="imaging")
+        self._lock = threading.Lock()
+        self._running = 0
+        self._queued = 0
+        self._started = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._wait_last = 0.0
+
+    def is_saturated(self) -> bool:
+        return self._queued >= self.queue_limit and self._running >= self.workers
+
+    def _run(self, submitted, fn, args):
+        waited = time.monotonic() - submitted
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self._started += 1
+            self._wait_total += waited
+            self._wait_last = waited
+            self._wait_max = max(self._wait_max, waited)
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+
+    def submit(self, fn, *args) -> Future:
+        with self._lock:
+            if self._running + self._queued >= self.workers + self.queue_limit:
+                self._rejected += 1
+                raise ImagingBusy()
+            self._queued += 1
+        return self._executor.submit(self._run, time.monotonic(), fn, args)
+
+    async def run(self, fn, *args):
+        """Runs `fn(*args)` on the imaging pool and awaits its result. Raises ImagingBusy when full."""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def stats(self):
+        with self._lock:
+            started = self._started
+            return {
+                "workers": self.workers,
+                "queue_limit": self.queue_limit,
+                "running": self._running,
+                "queued": self._queued,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "wait_ms": {
+                    "last": round(self._wait_last * 1000, 2),
+                    "avg": round(self._wait_total / started * 1000, 2) if started else 0.0,
+                    "max": round(self._wait_max * 1000, 2),
+                },
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Singleton instance
+imaging_executor = ImagingExecutor()
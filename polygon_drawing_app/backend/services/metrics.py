@@ -0,0 +1,64 @@
+from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Prometheus metrics of the hot paths, served by /metrics. Per-camera capture
+# FPS is rate(capture_frames_total[1m]); ingest rate is rate(ingest_updates_total[1m]).
+
+# Latency buckets in seconds, from sub-millisecond encodes to slow decodes
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+CAPTURE_DECODE_SECONDS = Histogram(
+    "capture_decode_seconds", "Time to decode a grabbed frame to BGR", ["camera"], buckets=LATENCY_BUCKETS
+)
+
+FRAME_RESIZE_SECONDS = Histogram(
+    "frame_resize_seconds", "Time to resize a frame for MJPEG / snapshots", ["level"], buckets=LATENCY_BUCKETS
+)
+FRAME_ENCODE_SECONDS = Histogram(
+    "frame_encode_seconds", "Time to JPEG-encode a resized frame", ["level"], buckets=LATENCY_BUCKETS
+)
+
+MJPEG_CLIENTS = Gauge("mjpeg_clients", "Connected MJPEG clients", ["camera"], multiprocess_mode="livesum")
+MJPEG_FRAMES_SENT = Counter("mjpeg_frames_sent", "Frames sent to MJPEG clients", ["level"])
+SSE_CLIENTS = Gauge("sse_clients", "Connected SSE clients", ["stream"], multiprocess_mode="livesum")
+
+INGEST_UPDATES = Counter("ingest_updates", "Per-camera count updates applied", ["endpoint"])
+# reason: validation (malformed update), unknown_camera (404), too_large (413, NDJSON line over the limit)
+INGEST_REJECTED = Counter("ingest_rejected", "Ingest updates rejected, by reason", ["endpoint", "reason"])
+INGEST_HANDLER_SECONDS = Histogram(
+    "ingest_handler_seconds", "Time spent handling an ingest request", ["endpoint"], buckets=LATENCY_BUCKETS
+)
+
+
+class RuntimeCollector:
+    """
+    Metrics read from the running services at scrape time rather than
+    recorded as they happen: capture status of every camera (which works for
+    every FRAME_SOURCE, since it comes from get_health), the imaging executor
+    queue and the vehicle counts waiting to be written.
+    """
+
+    def __init__(self, fetcher, executor, writer):
+        self.fetcher = fetcher
+        self.executor = executor
+        self.writer = writer
+
+    def collect(self):
+        frames = CounterMetricFamily("capture_frames", "Frames decoded per camera", labels=["camera"])
+        reconnects = CounterMetricFamily("capture_reconnects", "Stream reconnects per camera", labels=["camera"])
+        age = GaugeMetricFamily("capture_frame_age_seconds", "Age of the latest decoded frame", labels=["camera"])
+        connected = GaugeMetricFamily("capture_connected", "Whether the camera stream is connected", labels=["camera"])
+        for camera_id, health in self.fetcher.get_health().items():
+            frames.add_metric([camera_id], health.get("seq", 0))
+            reconnects.add_metric([camera_id], health.get("reconnects", 0))
+            connected.add_metric([camera_id], 1 if health.get("connected") else 0)
+            if health.get("frame_age") is not None:
+                age.add_metric([camera_id], health["frame_age"])
+        yield from (frames, reconnects, age, connected)
+
+        stats = self.executor.stats()
+        yield GaugeMetricFamily("imaging_queue_depth", "Imaging jobs waiting for a worker", value=stats["queued"])
+        yield GaugeMetricFamily("imaging_running", "Imaging jobs being processed", value=stats["running"])
+        yield CounterMetricFamily("imaging_rejected", "Imaging jobs rejected as overloaded", value=stats["rejected"])
+        yield GaugeMetricFamily("count_writer_pending_rows", "Vehicle count rows waiting to be written",
+                                value=self.writer.pending())
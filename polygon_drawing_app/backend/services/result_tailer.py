@@ -0,0 +1,140 @@
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+from config import RESULTS_DIR
+
+# Bytes read from the end of a results file to find its last line; doubled
+# until a complete line is found
+TAIL_CHUNK = 64 * 1024
+
+
+class _TailState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.offset = 0  # bytes of the file consumed so far
+        self.size = -1
+        self.mtime = -1.0
+        self.partial = b""  # trailing line still being written
+        self.latest: Optional[dict] = None
+
+
+class ResultTailer:
+    """
+    Reads the latest frame result of each video being processed.
+
+    Results are NDJSON, `{RESULTS_DIR}/{video_name}.ndjson`, one frame object
+    per line, appended as frames are processed (see `append_result`). The
+    reader remembers how far it has read and, when the file's size or mtime
+    changed, reads only the end of what was appended since, from the last
+    TAIL_CHUNK bytes backwards until it finds a complete line; only that line
+    is parsed. The first poll of a file does the same, so an existing large
+    file isn't read from the start. The parsed frame is cached, so polls of
+    an unchanged file cost a single stat(). Each video has its own lock.
+
+    Videos that only have the legacy `{video_name}.json` array are still
+    supported; a JSON array can't be tailed, so that file is re-parsed
+    whenever its size or mtime changes.
+    """
+
+    def __init__(self, data_dir: str = RESULTS_DIR):
+        self.data_dir = data_dir
+        self._tails: Dict[str, _TailState] = {}
+        self._lock = threading.Lock()
+
+    def ndjson_path(self, video_name: str) -> str:
+        return os.path.join(self.data_dir, f"{video_name}.ndjson")
+
+    def legacy_path(self, video_name: str) -> str:
+        return os.path.join(self.data_dir, f"{video_name}.json")
+
+    def latest(self, video_name: str) -> Optional[dict]:
+        """Returns the most recent frame result of a video, or None if there is none yet."""
+        path = self.ndjson_path(video_name)
+        if os.path.exists(path):
+            state = self._state(path)
+            with state.lock:
+                return self._tail_ndjson(video_name, path, state)
+        path = self.legacy_path(video_name)
+        if os.path.exists(path):
+            state = self._state(path)
+            with state.lock:
+                return self._read_legacy(path, state)
+        return None
+
+    def _state(self, key: str) -> _TailState:
+        with self._lock:
+            if key not in self._tails:
+                self._tails[key] = _TailState()
+            return self._tails[key]
+
+    @staticmethod
+    def _last_result(video_name: str, lines) -> Optional[dict]:
+        for line in reversed(lines):
+            if not line.strip():
+                continue
+            try:
+                return json.loads(line)
+            except ValueError:
+                print(f"[WARN] Skipping malformed result line for {video_name}")
+        return None
+
+    def _tail_ndjson(self, video_name: str, path: str, state: _TailState) -> Optional[dict]:
+        stat = os.stat(path)
+        if stat.st_size == state.size and stat.st_mtime == state.mtime:
+            return state.latest
+
+        if stat.st_size < state.offset:
+            # Truncated or rewritten: start over
+            state.offset, state.partial, state.latest = 0, b"", None
+
+        end = stat.st_size
+        window = TAIL_CHUNK
+        with open(path, "rb") as f:
+            while True:
+                start = max(state.offset, end - window)
+                f.seek(start)
+                data = f.read(end - start)
+                if start == state.offset:
+                    data = state.partial + data
+                lines = data.split(b"\n")
+                partial = lines.pop()
+                if start > state.offset:
+                    lines = lines[1:]  # may begin mid-line
+                latest = self._last_result(video_name, lines)
+                if latest is not None or start == state.offset:
+                    break
+                window *= 2
+
+        state.offset = end
+        state.partial = partial
+        state.size, state.mtime = stat.st_size, stat.st_mtime
+        if latest is not None:
+            state.latest = latest
+        return state.latest
+
+    def _read_legacy(self, path: str, state: _TailState) -> Optional[dict]:
+        stat = os.stat(path)
+        if stat.st_size == state.size and stat.st_mtime == state.mtime:
+            return state.latest
+
+        with open(path, "r") as f:
+            data = json.load(f)
+        state.size, state.mtime = stat.st_size, stat.st_mtime
+        state.latest = data[-1] if data else None
+        return state.latest
+
+
+def append_result(video_name: str, result: dict, data_dir: str = RESULTS_DIR):
+    """
+    Appends one frame result to a video's NDJSON results file. For the video
+    processing job, which runs outside the API and is not part of this tree.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    with open(os.path.join(data_dir, f"{video_name}.ndjson"), "a") as f:
+        f.write(json.dumps(result, separators=(",", ":")) + "\n")
+
+
+# Singleton instance
+result_tailer = ResultTailer()
@@ -1,78 +1,550 @@
+import asyncio
 import threading
 import cv2
 import os
+import random
 import datetime
 import time
-from config import RTMP_STREAMS, VIDEO_FPS
+from typing import NamedTuple, Optional
+import numpy as np
+from config import (
+    RTMP_STREAMS, VIDEO_FPS, FRAME_SOURCE, CAPTURE_TARGET_FPS, DEMAND_LINGER_SECONDS,
+    CAPTURE_STALE_SECONDS, CAPTURE_BACKOFF_BASE, CAPTURE_BACKOFF_MAX, CAPTURE_STARTUP_STAGGER,
+    FRAME_RING_SLOTS, FRAME_RING_MAX_WIDTH, FRAME_RING_MAX_HEIGHT,
+)
+from services.frame_ring import SharedFrameRing
+from services.capture_supervisor import CaptureSupervisor, stream_changes
+from services.camera_config import camera_config
+from services.metrics import CAPTURE_DECODE_SECONDS
 
 FRAME_INTERVAL = 1 / VIDEO_FPS
 
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class CapturedFrame(NamedTuple):
+    """A decoded frame with its per-camera sequence number and capture time."""
+    image: np.ndarray
+    seq: int
+    timestamp: float
+
+
 class CameraCaptureThread(threading.Thread):
-    def __init__(self, camera_id, rtsp_url, latest_frames, save_dir='saved_frames'):
+    """
+    Reads one camera stream. A local video file path is accepted in place of
+    a stream URL (e.g. for benchmarks): it is played at its own frame rate
+    and looped, like a live camera.
+    """
+
+    def __init__(self, camera_id, rtsp_url, on_frame, is_wanted=None, on_status=None,
+                 target_fps=CAPTURE_TARGET_FPS, start_delay=0.0, save_dir='saved_frames'):
         super().__init__(daemon=True)
         self.camera_id = camera_id
         self.rtsp_url = rtsp_url
-        self.latest_frames = latest_frames  # shared dict from the main class
+        self.on_frame = on_frame  # callback into the main class
+        self.is_wanted = is_wanted or (lambda camera_id: True)
+        self.on_status = on_status or (lambda camera_id, connected, reconnects: None)
+        self.decode_interval = 1 / target_fps if target_fps > 0 else 0
+        self.start_delay = start_delay
+        self.reconnects = 0
+        self.is_file = os.path.isfile(rtsp_url)
         self.save_dir = save_dir
         os.makedirs(self.save_dir, exist_ok=True)
-        self._running = threading.Event()
-        self._running.set()
+        self._stopped = threading.Event()
 
     def stop(self):
-        self._running.clear()
+        self._stopped.set()
+
+    def _open(self):
+        timeout_ms = int(CAPTURE_STALE_SECONDS * 1000)
+        cap = cv2.VideoCapture(self.rtsp_url, cv2.CAP_FFMPEG, [
+            cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, timeout_ms,
+            cv2.CAP_PROP_READ_TIMEOUT_MSEC, timeout_ms,
+        ])
+        if not cap.isOpened():
+            cap.release()
+            return None
+        return cap
+
+    @staticmethod
+    def _backoff(attempt):
+        delay = min(CAPTURE_BACKOFF_MAX, CAPTURE_BACKOFF_BASE * 2 ** attempt)
+        return delay * random.uniform(0.5, 1.5)
 
     def run(self):
         cap = None
+        attempt = 0
+        next_decode_at = 0.0
+        last_grab_at = 0.0
+        file_interval = 0.0
+        next_grab_at = 0.0
 
-        while self._running.is_set():
+        # Spread initial connections so a restart doesn't hit the media server all at once
+        if self._stopped.wait(self.start_delay):
+            return
+
+        while not self._stopped.is_set():
             if cap is None:
-                cap = cv2.VideoCapture(self.rtsp_url)
-                if not cap.isOpened():
-                    print(f"[{self.camera_id}] Failed to open RTSP stream {self.rtsp_url}, retrying in 5s")
-                    cap.release()
-                    cap = None
-                    time.sleep(5)
+                cap = self._open()
+                if cap is None:
+                    delay = self._backoff(attempt)
+                    attempt += 1
+                    print(f"[{self.camera_id}] Failed to open RTSP stream {self.rtsp_url}, retrying in {delay:.1f}s")
+                    self._stopped.wait(delay)
+                    continue
+                print(f"[{self.camera_id}] RTSP stream opened")
+                attempt = 0
+                last_grab_at = time.monotonic()
+                if self.is_file:
+                    file_fps = cap.get(cv2.CAP_PROP_FPS)
+                    file_interval = 1 / file_fps if file_fps > 0 else FRAME_INTERVAL
+                self.on_status(self.camera_id, True, self.reconnects)
+
+            if self.is_file:
+                # Play files in real time rather than as fast as they decode
+                now = time.monotonic()
+                if now < next_grab_at:
+                    self._stopped.wait(next_grab_at - now)
+                next_grab_at = max(now, next_grab_at) + file_interval
+
+            # Always grab so the connection stays alive and the stream is drained
+            if not cap.grab():
+                if self.is_file and cap.set(cv2.CAP_PROP_POS_FRAMES, 0):
+                    # End of file: loop
                     continue
-                else:
-                    print(f"[{self.camera_id}] RTSP stream opened")
+                if time.monotonic() - last_grab_at < CAPTURE_STALE_SECONDS:
+                    # Tolerate short hiccups without spinning
+                    self._stopped.wait(FRAME_INTERVAL)
+                    continue
+                # The last good frame keeps being served, marked as stale
+                print(f"[{self.camera_id}] No frames for {CAPTURE_STALE_SECONDS}s, reconnecting")
+                cap.release()
+                cap = None
+                self.reconnects += 1
+                self.on_status(self.camera_id, False, self.reconnects)
+                continue
+            last_grab_at = time.monotonic()
 
-            _, frame_bgr = cap.read()
+            # Only convert frames to BGR when someone is watching, and no
+            # faster than the target FPS
+            if not self.is_wanted(self.camera_id):
+                continue
+            now = time.monotonic()
+            if now < next_decode_at:
+                continue
+            next_decode_at = now + self.decode_interval
 
-            self.latest_frames[self.camera_id] = frame_bgr
+            with CAPTURE_DECODE_SECONDS.labels(self.camera_id).time():
+                ret, frame_bgr = cap.retrieve()
+            if ret:
+                self.on_frame(self.camera_id, frame_bgr)
         if cap:
             cap.release()
             print(f"[{self.camera_id}] VideoCapture released.")
 
 
 class RTSPFrameFetcherCV:
-    def __init__(self):
-        self.latest_frames = {}
+    def __init__(self, shared_memory=False, owns_rings=True):
+        self.latest_frames = {}  # camera_id -> CapturedFrame
         self._threads = {}
-    
-    def start(self):
-        for camera_id, rtsp_url in RTMP_STREAMS.items():
-            if camera_id not in self._threads or not self._threads[camera_id].is_alive():
-                thread = CameraCaptureThread(camera_id, rtsp_url, self.latest_frames)
-                self._threads[camera_id] = thread
-                thread.start()
-                print(f"[{camera_id}] Thread started")
+        # When enabled, every frame is also published to a per-camera
+        # shared-memory ring so other processes can read it (see capture.py).
+        # Rings are unlinked on stop unless another process owns them.
+        self.shared_memory = shared_memory
+        self.owns_rings = owns_rings
+        self._rings = {}
+        self._demand_until = {}  # camera_id -> wall-clock time until which frames are wanted
+        self._status = {}  # camera_id -> (connected, reconnects)
+        self._conditions = {}
+        self._conditions_guard = threading.Lock()
+        self._async_waiters = {}  # camera_id -> [(loop, future)], woken by the next frame
+
+    def _get_condition(self, camera_id):
+        with self._conditions_guard:
+            if camera_id not in self._conditions:
+                self._conditions[camera_id] = threading.Condition()
+            return self._conditions[camera_id]
+
+    def _latest_seq(self, camera_id):
+        packet = self.latest_frames.get(camera_id)
+        return packet.seq if packet else 0
+
+    def _on_frame(self, camera_id, frame):
+        condition = self._get_condition(camera_id)
+        with condition:
+            previous = self.latest_frames.get(camera_id)
+            seq = previous.seq + 1 if previous else 1
+            timestamp = time.time()
+            self.latest_frames[camera_id] = CapturedFrame(frame, seq, timestamp)
+            condition.notify_all()
+            waiters = self._async_waiters.pop(camera_id, None)
+
+        for loop, future in waiters or ():
+            try:
+                loop.call_soon_threadsafe(_resolve, future)
+            except RuntimeError:
+                pass  # the waiter's event loop is closed
+
+        ring = self._rings.get(camera_id)
+        if ring is not None:
+            ring.write(frame, timestamp)
+
+    def _on_status(self, camera_id, connected, reconnects):
+        self._status[camera_id] = (connected, reconnects)
+        ring = self._rings.get(camera_id)
+        if ring is not None:
+            ring.set_status(connected, reconnects)
+
+    def start(self, streams=None):
+        streams = RTMP_STREAMS if streams is None else streams
+        for index, (camera_id, rtsp_url) in enumerate(streams.items()):
+            self.add_camera(camera_id, rtsp_url, start_delay=index * CAPTURE_STARTUP_STAGGER)
+
+    def add_camera(self, camera_id, rtsp_url, start_delay=0.0):
+        if camera_id in self._threads and self._threads[camera_id].is_alive():
+            return
+        if self.shared_memory and camera_id not in self._rings:
+            self._rings[camera_id] = SharedFrameRing.open(
+                camera_id, FRAME_RING_SLOTS, FRAME_RING_MAX_WIDTH, FRAME_RING_MAX_HEIGHT, owner=self.owns_rings
+            )
+        thread = CameraCaptureThread(
+            camera_id, rtsp_url, self._on_frame, self.wants_frames, self._on_status, start_delay=start_delay
+        )
+        self._threads[camera_id] = thread
+        thread.start()
+        print(f"[{camera_id}] Thread started")
+
+    def _stop_thread(self, camera_id):
+        thread = self._threads.pop(camera_id, None)
+        if thread is not None:
+            thread.stop()
+            thread.join(timeout=5)
+
+    def remove_camera(self, camera_id):
+        self._stop_thread(camera_id)
+        ring = self._rings.pop(camera_id, None)
+        if ring is not None:
+            ring.close()
+        self.latest_frames.pop(camera_id, None)
+        self._status.pop(camera_id, None)
+        print(f"[{camera_id}] Thread stopped")
+
+    def update_streams(self, streams):
+        """
+        Starts capture for new cameras and stops it for removed ones. A camera
+        whose source changed is reconnected, keeping its latest frame and
+        sequence numbers; the others keep their connections untouched.
+        Returns the cameras added, removed and restarted.
+        """
+        changes = {"added": [], "removed": [], "restarted": []}
+        for camera_id, thread in list(self._threads.items()):
+            if camera_id not in streams:
+                self.remove_camera(camera_id)
+                changes["removed"].append(camera_id)
+            elif streams[camera_id] != thread.rtsp_url:
+                self._stop_thread(camera_id)
+                self.add_camera(camera_id, streams[camera_id])
+                changes["restarted"].append(camera_id)
+        for camera_id, rtsp_url in streams.items():
+            if camera_id not in self._threads:
+                self.add_camera(camera_id, rtsp_url)
+                changes["added"].append(camera_id)
+        return changes
 
     def stop(self):
-        for thread in self._threads.values():
+        threads = list(self._threads.values())
+        for thread in threads:
             thread.stop()
-        for thread in self._threads.values():
+        for thread in threads:
             thread.join()
+        for ring in self._rings.values():
+            ring.close()
+        self._rings.clear()
         print("All camera threads stopped")
 
+    def get_health(self):
+        """Per-camera capture status, as reported by /capture-health."""
+        now = time.time()
+        health = {}
+        for camera_id, thread in list(self._threads.items()):
+            packet = self.latest_frames.get(camera_id)
+            connected, reconnects = self._status.get(camera_id, (False, 0))
+            health[camera_id] = {
+                "alive": thread.is_alive(),
+                "connected": connected,
+                "reconnects": reconnects,
+                "seq": packet.seq if packet else 0,
+                "frame_age": round(now - packet.timestamp, 3) if packet else None,
+            }
+        return health
+
+    def has_camera(self, camera_id):
+        # A camera is known as soon as it is added, before its first frame
+        return camera_id in self._threads or camera_id in self.latest_frames
+
+    def is_stale(self, camera_id):
+        """True while the camera is disconnected and only its last good frame is available."""
+        return not self._status.get(camera_id, (False, 0))[0]
+
+    def request_frames(self, camera_id, linger=DEMAND_LINGER_SECONDS):
+        """
+        Marks a camera as watched for the next `linger` seconds. Cameras nobody
+        asks for are only grabbed, not decoded.
+        """
+        self._demand_until[camera_id] = time.time() + linger
+
+    def wants_frames(self, camera_id):
+        until = self._demand_until.get(camera_id, 0.0)
+        ring = self._rings.get(camera_id)
+        if ring is not None:
+            # Readers in other processes register their demand in the ring
+            until = max(until, ring.demand_until())
+        return time.time() < until
+
+    def is_frame_intact(self, camera_id, packet):
+        # Frames captured in this process are never overwritten in place
+        return True
+
     def get_latest_frame(self, camera_id):
-        frame = self.latest_frames.get(camera_id)
-        return frame
+        packet = self.latest_frames.get(camera_id)
+        return packet.image if packet else None
+
+    def get_latest_packet(self, camera_id) -> Optional[CapturedFrame]:
+        return self.latest_frames.get(camera_id)
+
+    def wait_for_frame(self, camera_id, after_seq=0, timeout=None) -> Optional[CapturedFrame]:
+        """
+        Blocks until a frame newer than `after_seq` is captured for the camera.
+        Returns None if the timeout expires first.
+        """
+        condition = self._get_condition(camera_id)
+        with condition:
+            condition.wait_for(
+                lambda: self._latest_seq(camera_id) > after_seq,
+                timeout=timeout,
+            )
+            packet = self.latest_frames.get(camera_id)
+        if packet is None or packet.seq <= after_seq:
+            return None
+        return packet
+
+    async def wait_for_frame_async(self, camera_id, after_seq=0, timeout=None) -> Optional[CapturedFrame]:
+        """
+        Awaitable variant of wait_for_frame for use from the event loop. The
+        capture thread wakes the waiter directly, so no thread is held while waiting.
+        """
+        packet = self.latest_frames.get(camera_id)
+        if packet is not None and packet.seq > after_seq:
+            return packet
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = (loop, future)
+        condition = self._get_condition(camera_id)
+        with condition:
+            # Checked again under the lock so a frame arriving meanwhile isn't missed
+            if self._latest_seq(camera_id) > after_seq:
+                return self.latest_frames.get(camera_id)
+            self._async_waiters.setdefault(camera_id, []).append(waiter)
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            with condition:
+                waiters = self._async_waiters.get(camera_id)
+                if waiters and waiter in waiters:
+                    waiters.remove(waiter)
+
+        packet = self.latest_frames.get(camera_id)
+        if packet is None or packet.seq <= after_seq:
+            return None
+        return packet
 
     def get_all_latest_frames(self):
         # Return shallow copy of all latest frames dictionary
-        # (Note: bytes objects are immutable so shallow copy is safe)
+        # (Note: CapturedFrame tuples are immutable so shallow copy is safe)
         return self.latest_frames.copy()
 
 
+class SharedFrameReader:
+    """
+    Frame source for API workers when capture runs in a separate process.
+    Reads the latest frame of each camera from its shared-memory ring,
+    exposing the same interface as RTSPFrameFetcherCV.
+    """
+
+    def __init__(self, poll_interval=FRAME_INTERVAL / 4):
+        self.poll_interval = poll_interval
+        self.streams = dict(RTMP_STREAMS)  # cameras being captured, as set by start / update_streams
+        self._rings = {}
+        self._lock = threading.Lock()
+
+    def _get_ring(self, camera_id):
+        ring = self._rings.get(camera_id)
+        if ring is not None:
+            return ring
+        with self._lock:
+            if camera_id not in self._rings:
+                try:
+                    self._rings[camera_id] = SharedFrameRing.attach(camera_id)
+                    print(f"[{camera_id}] Attached to shared frame ring")
+                except FileNotFoundError:
+                    # Capture process has not created this camera's ring yet
+                    return None
+                except (OSError, ValueError):
+                    # Not a valid ring name (an id with "/", say) or not a ring
+                    return None
+            return self._rings[camera_id]
+
+    def start(self, streams=None):
+        if streams is not None:
+            self.streams = dict(streams)
+        print(f"[INFO] Reading frames from shared memory for {len(self.streams)} cameras")
+
+    def update_streams(self, streams):
+        """
+        Follows a change of the camera list made by the capture process.
+        Returns the cameras added, removed and restarted.
+        """
+        previous, self.streams = self.streams, dict(streams)
+        for camera_id in previous.keys() - streams.keys():
+            with self._lock:
+                ring = self._rings.pop(camera_id, None)
+            if ring is not None:
+                ring.close()
+        return stream_changes(previous, streams)
+
+    def stop(self):
+        for ring in self._rings.values():
+            ring.close()
+        self._rings.clear()
+
+    def has_camera(self, camera_id):
+        # A camera added to the table since this worker's last reconcile is
+        # known once its ring exists; other ids never touch shared memory
+        if camera_id in self.streams:
+            return True
+        return camera_config.get(camera_id) is not None and self._get_ring(camera_id) is not None
+
+    def request_frames(self, camera_id, linger=DEMAND_LINGER_SECONDS):
+        ring = self._get_ring(camera_id)
+        if ring is not None:
+            ring.request_frames(time.time() + linger)
+
+    def is_stale(self, camera_id):
+        ring = self._get_ring(camera_id)
+        return ring is None or not ring.status()[0]
+
+    def _latest_seq(self, camera_id):
+        ring = self._get_ring(camera_id)
+        return ring.latest()[0] if ring else 0
+
+    def get_latest_packet(self, camera_id) -> Optional[CapturedFrame]:
+        ring = self._get_ring(camera_id)
+        if ring is None:
+            return None
+        latest = ring.read_latest()
+        return CapturedFrame(*latest) if latest else None
+
+    def get_latest_frame(self, camera_id):
+        packet = self.get_latest_packet(camera_id)
+        return packet.image if packet else None
+
+    def is_frame_intact(self, camera_id, packet):
+        ring = self._rings.get(camera_id)
+        return ring is not None and ring.is_intact(packet.seq)
+
+    def wait_for_frame(self, camera_id, after_seq=0, timeout=None) -> Optional[CapturedFrame]:
+        """
+        Polls the ring header until a frame newer than `after_seq` is published.
+        Returns None if the timeout expires first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._latest_seq(camera_id) <= after_seq:
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+        packet = self.get_latest_packet(camera_id)
+        if packet is None or packet.seq <= after_seq:
+            return None
+        return packet
+
+    async def wait_for_frame_async(self, camera_id, after_seq=0, timeout=None) -> Optional[CapturedFrame]:
+        """Awaitable variant of wait_for_frame, polling from the event loop instead of a thread."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._latest_seq(camera_id) <= after_seq:
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            await asyncio.sleep(self.poll_interval)
+        packet = self.get_latest_packet(camera_id)
+        if packet is None or packet.seq <= after_seq:
+            return None
+        return packet
+
+    def get_health(self):
+        now = time.time()
+        health = {}
+        for camera_id in list(self.streams):
+            ring = self._get_ring(camera_id)
+            seq, timestamp = ring.latest() if ring else (0, 0.0)
+            connected, reconnects = ring.status() if ring else (False, 0)
+            health[camera_id] = {
+                "alive": ring is not None,
+                "connected": connected,
+                "reconnects": reconnects,
+                "seq": seq,
+                "frame_age": round(now - timestamp, 3) if seq else None,
+            }
+        return health
+
+    def get_all_latest_frames(self):
+        frames = {}
+        for camera_id in list(self.streams):
+            packet = self.get_latest_packet(camera_id)
+            if packet is not None:
+                frames[camera_id] = packet
+        return frames
+
+
+class SupervisedFrameReader(SharedFrameReader):
+    """
+    Runs the capture process pool inside the API process and reads the
+    frames it publishes to shared memory.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.supervisor = CaptureSupervisor()
+
+    def start(self, streams=None):
+        super().start(streams)
+        self.supervisor.start(self.streams)
+
+    def update_streams(self, streams):
+        changes = super().update_streams(streams)
+        self.supervisor.update_streams(streams)
+        return changes
+
+    def stop(self):
+        super().stop()
+        self.supervisor.stop()
+
+    def get_health(self):
+        health = self.supervisor.get_health()
+        # Frame age read straight from the ring is fresher than the last report
+        for camera_id, status in super().get_health().items():
+            health.setdefault(camera_id, {}).update(
+                connected=status["connected"], seq=status["seq"], frame_age=status["frame_age"]
+            )
+        return health
+
+
 # Singleton instance
-rtsp_fetcher = RTSPFrameFetcherCV()
\ No newline at end of file
+if FRAME_SOURCE == "shared":
+    rtsp_fetcher = SharedFrameReader()
+elif FRAME_SOURCE == "process":
+    rtsp_fetcher = SupervisedFrameReader()
+else:
+    rtsp_fetcher = RTSPFrameFetcherCV()
\ No newline at end of file
@@ -0,0 +1,236 @@
+import asyncio
+import json
+from abc import ABC, abstractmethod
+import os
+import uuid
+from typing import Callable, Dict, List, Tuple
+
+from config import STATE_BACKEND, REDIS_URL, STATE_KEY_PREFIX
+
+# camera_id -> zone -> (motorbikes, cars) to add
+Increments = Dict[str, Dict[str, Tuple[int, int]]]
+# Called on the event loop with a camera and the (motorbikes, cars) each of its zones gained
+ChangeListener = Callable[[str, Dict[str, Tuple[int, int]]], None]
+
+
+class StateBackend(ABC):
+    """
+    Where the cumulative vehicle counts and overview snapshots live.
+
+    Every worker keeps the counts of every camera in memory, so `counts` is a
+    plain read that SSE hubs can call on each flush. `increment` applies
+    counts atomically and every worker's change listeners are then called
+    with what changed, wherever the increment came from. Per-camera and
+    site-wide totals are kept up to date along with the zone counts.
+    """
+
+    def __init__(self):
+        self._counts: Dict[str, Dict[str, Dict[str, int]]] = {}
+        self._totals: Dict[str, Dict[str, int]] = {}
+        self._site_totals = {"number_of_motorbike": 0, "number_of_car": 0}
+        self._listeners: List[ChangeListener] = []
+
+    def on_change(self, listener: ChangeListener):
+        self._listeners.append(listener)
+
+    def _notify(self, camera_id: str, deltas: Dict[str, Tuple[int, int]]):
+        for listener in self._listeners:
+            listener(camera_id, deltas)
+
+    def counts(self, camera_id: str) -> Dict[str, Dict[str, int]]:
+        """The live `{zone: counts}` of a camera. Don't modify it."""
+        return self._counts.get(camera_id, {})
+
+    def totals(self, camera_id: str) -> Dict[str, int]:
+        """The live counts of a camera summed over its zones. Don't modify it."""
+        return self._totals.get(camera_id, {"number_of_motorbike": 0, "number_of_car": 0})
+
+    def site_totals(self) -> Dict[str, int]:
+        """The live counts summed over every camera. Don't modify it."""
+        return self._site_totals
+
+    def camera_ids(self) -> List[str]:
+        return list(self._counts)
+
+    def _add(self, camera_id: str, zone: str, motorbikes: int, cars: int):
+        camera_counts = self._counts.get(camera_id)
+        if camera_counts is None:
+            camera_counts = self._counts[camera_id] = {}
+            self._totals[camera_id] = {"number_of_motorbike": 0, "number_of_car": 0}
+        counts = camera_counts.get(zone)
+        if counts is None:
+            counts = camera_counts[zone] = {"number_of_motorbike": 0, "number_of_car": 0}
+        for totals in (counts, self._totals[camera_id], self._site_totals):
+            totals["number_of_motorbike"] += motorbikes
+            totals["number_of_car"] += cars
+
+    def _merge(self, camera_id: str, totals: Dict[str, Tuple[int, int]]) -> Dict[str, Tuple[int, int]]:
+        """
+        Raises the local counts to `totals` and returns what each zone gained.
+        Counts only grow, so totals that arrive out of order are harmless.
+        """
+        camera_counts = self._counts.get(camera_id, {})
+        deltas = {}
+        for zone, (motorbikes, cars) in totals.items():
+            counts = camera_counts.get(zone)
+            if counts is None:
+                gained = (motorbikes, cars)
+            else:
+                gained = (max(0, motorbikes - counts["number_of_motorbike"]), max(0, cars - counts["number_of_car"]))
+                if gained == (0, 0):
+                    continue
+            self._add(camera_id, zone, *gained)
+            deltas[zone] = gained
+        return deltas
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    @abstractmethod
+    async def increment(self, increments: Increments):
+        """Adds `(motorbikes, cars)` to zones of cameras, atomically."""
+
+    @abstractmethod
+    async def save_snapshot(self, name: str, camera_id: str, data: dict):
+        """Stores a camera's `name` snapshot for every worker."""
+
+    @abstractmethod
+    async def load_snapshot(self, name: str, camera_id: str) -> dict:
+        """A camera's `name` snapshot, or {} if none was saved."""
+
+
+class InProcessStateBackend(StateBackend):
+    """State of a single worker process; nothing is shared."""
+
+    def __init__(self):
+        super().__init__()
+        self._snapshots: Dict[Tuple[str, str], dict] = {}
+
+    async def increment(self, increments: Increments):
+        for camera_id, zones in increments.items():
+            for zone, (motorbikes, cars) in zones.items():
+                self._add(camera_id, zone, motorbikes, cars)
+            self._notify(camera_id, zones)
+
+    async def save_snapshot(self, name: str, camera_id: str, data: dict):
+        self._snapshots[(name, camera_id)] = data
+
+    async def load_snapshot(self, name: str, camera_id: str) -> dict:
+        return self._snapshots.get((name, camera_id), {})
+
+
+class RedisStateBackend(StateBackend):
+    """
+    State shared by every worker and node through Redis (or any server
+    speaking its protocol).
+
+    Counts are kept in two hashes per camera (motorbikes and cars, keyed by
+    zone) and incremented in one MULTI transaction per request. The new
+    totals are then published on a channel; each worker merges the totals it
+    receives into its in-memory copy, which it loads on start.
+    """
+
+    def __init__(self, url=REDIS_URL, prefix=STATE_KEY_PREFIX):
+        super().__init__()
+        self.url = url
+        self.prefix = prefix
+        self.channel = f"{prefix}changes"
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._redis = None
+        self._listener_task = None
+
+    def _key(self, kind: str, camera_id: str) -> str:
+        return f"{self.prefix}{kind}:{camera_id}"
+
+    async def start(self):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(self.url, decode_responses=True)
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        # Subscribe before loading, so no change falls between the two
+        await pubsub.subscribe(self.channel)
+        await self._load()
+        self._listener_task = asyncio.create_task(self._listen(pubsub))
+        print(f"[INFO] Sharing tracking state through {self.url}")
+
+    async def stop(self):
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            await asyncio.gather(self._listener_task, return_exceptions=True)
+        if self._redis is not None:
+            await self._redis.aclose()
+
+    async def _load(self):
+        async for key in self._redis.scan_iter(match=self._key("motorbikes", "*")):
+            camera_id = key[len(self._key("motorbikes", "")):]
+            motorbikes = await self._redis.hgetall(key)
+            cars = await self._redis.hgetall(self._key("cars", camera_id))
+            self._merge(camera_id, {
+                zone: (int(motorbikes.get(zone, 0)), int(cars.get(zone, 0)))
+                for zone in motorbikes.keys() | cars.keys()
+            })
+        print(f"[INFO] Loaded shared counts of {len(self._counts)} cameras")
+
+    async def _listen(self, pubsub):
+        while True:
+            try:
+                async for message in pubsub.listen():
+                    change = json.loads(message["data"])
+                    if change["origin"] == self.origin:
+                        continue  # already merged when it was incremented
+                    totals = {zone: tuple(values) for zone, values in change["zones"].items()}
+                    deltas = self._merge(change["camera_id"], totals)
+                    if deltas:
+                        self._notify(change["camera_id"], deltas)
+            except asyncio.CancelledError:
+                await pubsub.aclose()
+                raise
+            except Exception as e:
+                print(f"[WARN] Lost the shared state channel: {e}, resubscribing")
+                await asyncio.sleep(1)
+                try:
+                    await pubsub.subscribe(self.channel)
+                    await self._load()  # catch up on what was missed
+                except Exception:
+                    pass
+
+    async def increment(self, increments: Increments):
+        order = []
+        async with self._redis.pipeline(transaction=True) as pipe:
+            for camera_id, zones in increments.items():
+                for zone, (motorbikes, cars) in zones.items():
+                    pipe.hincrby(self._key("motorbikes", camera_id), zone, motorbikes)
+                    pipe.hincrby(self._key("cars", camera_id), zone, cars)
+                    order.append((camera_id, zone))
+            results = await pipe.execute()
+
+        totals: Dict[str, Dict[str, Tuple[int, int]]] = {}
+        for index, (camera_id, zone) in enumerate(order):
+            totals.setdefault(camera_id, {})[zone] = (results[2 * index], results[2 * index + 1])
+
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for camera_id, zones in totals.items():
+                pipe.publish(self.channel, json.dumps({"origin": self.origin, "camera_id": camera_id, "zones": zones}))
+            await pipe.execute()
+
+        for camera_id, zones in totals.items():
+            deltas = self._merge(camera_id, zones)
+            if deltas:
+                self._notify(camera_id, deltas)
+
+    async def save_snapshot(self, name: str, camera_id: str, data: dict):
+        await self._redis.set(self._key(f"snapshot:{name}", camera_id), json.dumps(data))
+
+    async def load_snapshot(self, name: str, camera_id: str) -> dict:
+        data = await self._redis.get(self._key(f"snapshot:{name}", camera_id))
+        return json.loads(data) if data else {}
+
+
+# Singleton instance
+if STATE_BACKEND == "redis":
+    state_backend = RedisStateBackend()
+else:
+    state_backend = InProcessStateBackend()
@@ -0,0 +1,42 @@
+import time
+
+from config import MJPEG_LEVELS, MJPEG_SLOW_RATIO, MJPEG_FAST_RATIO, MJPEG_ADAPT_SECONDS
+
+
+class StreamQuality:
+    """
+    Picks the MJPEG quality level for one client from how fast it drains.
+
+    The server can only hand a frame to the client's connection as fast as
+    the client reads it (see SEND_LOWAT_BYTES), so the share of time spent
+    waiting on sends measures whether the client's bandwidth keeps up. Every
+    `adapt_seconds`, a stream that spent more than `slow_ratio` of the time
+    waiting steps down to a smaller, lower-quality level, and one that spent
+    less than `fast_ratio` steps back up.
+    """
+
+    def __init__(self, n_levels=len(MJPEG_LEVELS), slow_ratio=MJPEG_SLOW_RATIO,
+                 fast_ratio=MJPEG_FAST_RATIO, adapt_seconds=MJPEG_ADAPT_SECONDS):
+        self.max_level = n_levels - 1
+        self.slow_ratio = slow_ratio
+        self.fast_ratio = fast_ratio
+        self.adapt_seconds = adapt_seconds
+        self.level = 0
+        self._blocked = 0.0  # seconds spent sending since the window started
+        self._window_start = time.monotonic()
+
+    def observe(self, send_seconds):
+        """Records how long sending the last frame took and adapts the level."""
+        self._blocked += send_seconds
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed < self.adapt_seconds:
+            return
+
+        busy = self._blocked / elapsed
+        self._blocked = 0.0
+        self._window_start = now
+        if busy > self.slow_ratio and self.level < self.max_level:
+            self.level += 1
+        elif busy < self.fast_ratio and self.level > 0:
+            self.level -= 1
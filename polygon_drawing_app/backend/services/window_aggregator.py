@@ -0,0 +1,171 @@
+import threading
+import time
+from typing import Dict, Optional
+
+from config import SLIDING_WINDOWS, TUMBLING_WINDOWS, WINDOW_BUCKETS
+
+# Zone key under which a camera's totals over all zones are kept
+CAMERA_TOTAL = "*"
+
+
+class _SlidingWindow:
+    """
+    Counts over the last `length` seconds, split into `n_buckets` buckets.
+    Buckets that fall out of the window are subtracted from the running total
+    as time advances, so reading the total is O(1). The window moves one
+    bucket at a time, so it covers between `length - length / n_buckets`
+    and `length` seconds.
+    """
+
+    __slots__ = ("width", "n_buckets", "motorbikes", "cars", "total", "head")
+
+    def __init__(self, length: float, n_buckets: int):
+        self.width = length / n_buckets
+        self.n_buckets = n_buckets
+        self.motorbikes = [0] * n_buckets
+        self.cars = [0] * n_buckets
+        self.total = [0, 0]
+        self.head = None  # absolute index of the newest bucket
+
+    def advance(self, now: float):
+        bucket = int(now // self.width)
+        if self.head is None or bucket - self.head >= self.n_buckets:
+            self.motorbikes = [0] * self.n_buckets
+            self.cars = [0] * self.n_buckets
+            self.total = [0, 0]
+        else:
+            for expired in range(self.head + 1, bucket + 1):
+                index = expired % self.n_buckets
+                self.total[0] -= self.motorbikes[index]
+                self.total[1] -= self.cars[index]
+                self.motorbikes[index] = 0
+                self.cars[index] = 0
+        if self.head is None or bucket > self.head:
+            self.head = bucket
+
+    def add(self, now: float, motorbikes: int, cars: int):
+        self.advance(now)
+        # Late updates land in the newest bucket
+        index = self.head % self.n_buckets
+        self.motorbikes[index] += motorbikes
+        self.cars[index] += cars
+        self.total[0] += motorbikes
+        self.total[1] += cars
+
+    def totals(self, now: float):
+        self.advance(now)
+        return self.total[0], self.total[1]
+
+
+class _TumblingWindow:
+    """
+    Counts since the start of the current `length`-second window, aligned to
+    local time. The window is closed lazily, on the first access after it
+    ends; the closed window's counts are kept as `previous`.
+    """
+
+    __slots__ = ("length", "start", "total", "previous")
+
+    def __init__(self, length: float):
+        self.length = length
+        self.start = None
+        self.total = [0, 0]
+        self.previous = (0, 0)
+
+    def roll(self, now: float):
+        offset = time.localtime(now).tm_gmtoff
+        start = now - (now + offset) % self.length
+        if self.start is None or start > self.start:
+            if self.start is not None and start - self.start < self.length * 1.5:
+                self.previous = (self.total[0], self.total[1])
+            else:
+                self.previous = (0, 0)
+            self.start = start
+            self.total = [0, 0]
+
+    def add(self, now: float, motorbikes: int, cars: int):
+        self.roll(now)
+        self.total[0] += motorbikes
+        self.total[1] += cars
+
+    def totals(self, now: float):
+        self.roll(now)
+        return self.total[0], self.total[1]
+
+
+def _counts(motorbikes: int, cars: int) -> Dict[str, int]:
+    return {"number_of_motorbike": motorbikes, "number_of_car": cars}
+
+
+class _ZoneWindows:
+    def __init__(self, sliding: Dict[str, float], tumbling: Dict[str, float], n_buckets: int):
+        self.sliding = {name: _SlidingWindow(length, n_buckets) for name, length in sliding.items()}
+        self.tumbling = {name: _TumblingWindow(length) for name, length in tumbling.items()}
+
+    def add(self, now: float, motorbikes: int, cars: int):
+        for window in self.sliding.values():
+            window.add(now, motorbikes, cars)
+        for window in self.tumbling.values():
+            window.add(now, motorbikes, cars)
+
+    def totals(self, now: float) -> Dict[str, Dict[str, int]]:
+        result = {name: _counts(*window.totals(now)) for name, window in self.sliding.items()}
+        for name, window in self.tumbling.items():
+            result[name] = _counts(*window.totals(now))
+            result[f"previous_{name}"] = _counts(*window.previous)
+        return result
+
+
+class WindowAggregator:
+    """
+    Rolling vehicle counts per camera and zone over sliding windows
+    (SLIDING_WINDOWS) and tumbling windows (TUMBLING_WINDOWS).
+
+    Each ingested increment updates the zone's windows and the camera's
+    overall windows (under CAMERA_TOTAL). Expired buckets and finished
+    tumbling windows are only dealt with when that zone is next updated or
+    read, so nothing ever scans all cameras.
+    """
+
+    def __init__(self, sliding: Optional[Dict[str, float]] = None, tumbling: Optional[Dict[str, float]] = None,
+                 n_buckets: int = WINDOW_BUCKETS):
+        self.sliding = SLIDING_WINDOWS if sliding is None else sliding
+        self.tumbling = TUMBLING_WINDOWS if tumbling is None else tumbling
+        self.n_buckets = n_buckets
+        self._cameras: Dict[str, Dict[str, _ZoneWindows]] = {}
+        self._lock = threading.Lock()
+
+    def _windows(self, camera_id: str, zone: str) -> _ZoneWindows:
+        zones = self._cameras.setdefault(camera_id, {})
+        if zone not in zones:
+            zones[zone] = _ZoneWindows(self.sliding, self.tumbling, self.n_buckets)
+        return zones[zone]
+
+    def add(self, camera_id: str, zone: str, motorbikes: int, cars: int, timestamp: Optional[float] = None):
+        now = timestamp if timestamp is not None else time.time()
+        with self._lock:
+            self._windows(camera_id, zone).add(now, motorbikes, cars)
+            self._windows(camera_id, CAMERA_TOTAL).add(now, motorbikes, cars)
+
+    def totals(self, camera_id: str, zone: str = CAMERA_TOTAL, timestamp: Optional[float] = None):
+        """
+        Returns `{window: {"number_of_motorbike": n, "number_of_car": n}}` for
+        one zone, or for the whole camera by default.
+        """
+        now = timestamp if timestamp is not None else time.time()
+        with self._lock:
+            windows = self._cameras.get(camera_id, {}).get(zone)
+            if windows is None:
+                windows = _ZoneWindows(self.sliding, self.tumbling, self.n_buckets)
+            return windows.totals(now)
+
+    def snapshot(self, camera_id: str, timestamp: Optional[float] = None):
+        """Returns the window totals of every zone of a camera, plus CAMERA_TOTAL."""
+        now = timestamp if timestamp is not None else time.time()
+        with self._lock:
+            zones = self._cameras.get(camera_id, {})
+            return {zone: windows.totals(now) for zone, windows in zones.items()}
+
+
+# Singleton instance
+window_aggregator = WindowAggregator()
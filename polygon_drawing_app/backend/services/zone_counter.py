@@ -0,0 +1,150 @@
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import ZONE_CANVAS_WIDTH, ZONE_CANVAS_HEIGHT, TRACK_TTL_SECONDS, VEHICLE_CLASSES
+from services.camera_config import camera_config, parse_zone_points
+
+
+class CompiledZones:
+    """
+    Zone polygons packed into flat edge arrays so that many points can be
+    tested against every zone with one vectorized ray-casting pass.
+    """
+
+    def __init__(self, zones: List[Tuple[str, List[float]]]):
+        self.names = [name for name, _ in zones]
+        starts, ends, offsets = [], [], []
+        n_edges = 0
+        for _, coords in zones:
+            polygon = np.asarray(coords, dtype=np.float64)[: len(coords) // 2 * 2].reshape(-1, 2)
+            offsets.append(n_edges)
+            n_edges += len(polygon)
+            starts.append(polygon)
+            ends.append(np.roll(polygon, -1, axis=0))
+        if starts:
+            start = np.concatenate(starts)
+            end = np.concatenate(ends)
+        else:
+            start = end = np.empty((0, 2))
+        self.xi, self.yi = start[:, 0], start[:, 1]
+        self.xj, self.yj = end[:, 0], end[:, 1]
+        self.offsets = np.asarray(offsets, dtype=np.intp)
+
+    def contains(self, points: np.ndarray) -> np.ndarray:
+        """
+        Returns a (len(points), len(zones)) boolean matrix telling which zone
+        contains each (x, y) point.
+        """
+        if len(points) == 0 or len(self.names) == 0:
+            return np.zeros((len(points), len(self.names)), dtype=bool)
+        px = points[:, 0:1]
+        py = points[:, 1:2]
+        straddles = (self.yi > py) != (self.yj > py)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_cross = (self.xj - self.xi) * (py - self.yi) / (self.yj - self.yi) + self.xi
+        crossings = straddles & (px < x_cross)
+        # Sum crossings per zone; an odd count means the point is inside
+        per_zone = np.add.reduceat(crossings.astype(np.int32), self.offsets, axis=1)
+        return (per_zone % 2) == 1
+
+
+class _CameraZones:
+    def __init__(self, compiled: CompiledZones, config_version: int = 0):
+        self.compiled = compiled
+        self.config_version = config_version
+        self.seen: Dict[str, Dict[int, float]] = {}  # zone -> track_id -> last seen
+        self.last_prune = time.monotonic()
+
+
+class ZoneCounter:
+    """
+    Counts vehicles per zone from raw detections. Each track is counted once
+    per zone it enters; tracks not seen for TRACK_TTL_SECONDS are forgotten.
+    Zone polygons come from the camera config cache and are recompiled only
+    when the camera's config version changes.
+    """
+
+    def __init__(self, track_ttl: float = TRACK_TTL_SECONDS):
+        self.track_ttl = track_ttl
+        self._cameras: Dict[str, _CameraZones] = {}
+        self._lock = threading.Lock()
+
+    def set_zones(self, camera_id: str, points, config_version: int = 0):
+        """(Re)compiles a camera's zones."""
+        compiled = CompiledZones(parse_zone_points(points))
+        with self._lock:
+            previous = self._cameras.get(camera_id)
+            state = _CameraZones(compiled, config_version)
+            if previous is not None:
+                # Keep dedupe state for zones that still exist
+                state.seen = {name: seen for name, seen in previous.seen.items() if name in compiled.names}
+            self._cameras[camera_id] = state
+            return state
+
+    def _state(self, camera_id: str) -> Optional[_CameraZones]:
+        entry = camera_config.get(camera_id)
+        if entry is None:
+            return None
+        state = self._cameras.get(camera_id)
+        if state is None or state.config_version != entry.version:
+            state = self.set_zones(camera_id, entry.points, entry.version)
+        return state
+
+    def _prune(self, state: _CameraZones, now: float):
+        if now - state.last_prune < self.track_ttl / 2:
+            return
+        state.last_prune = now
+        for seen in state.seen.values():
+            expired = [track_id for track_id, last_seen in seen.items() if now - last_seen > self.track_ttl]
+            for track_id in expired:
+                del seen[track_id]
+
+    def count(self, camera_id: str, detections, frame_size: Optional[Tuple[int, int]] = None) -> Dict[str, Dict[str, int]]:
+        """
+        Assigns detections to zones and returns the new vehicles per zone,
+        as `{zone: {"number_of_motorbike": n, "number_of_car": n}}`.
+        Detections of classes outside VEHICLE_CLASSES are ignored.
+        """
+        state = self._state(camera_id)
+        if state is None or not detections:
+            return {}
+
+        fields, boxes, track_ids = [], [], []
+        for detection in detections:
+            field = VEHICLE_CLASSES.get(str(detection.cls).lower())
+            if field is None:
+                continue
+            fields.append(field)
+            boxes.append(detection.bbox)
+            track_ids.append(detection.track_id)
+        if not boxes:
+            return {}
+
+        boxes = np.asarray(boxes, dtype=np.float64)
+        # Bottom-centre of the box: where the vehicle touches the road
+        anchors = np.column_stack(((boxes[:, 0] + boxes[:, 2]) / 2, boxes[:, 3]))
+        if frame_size:
+            # Polygons are drawn on the editor's ZONE_CANVAS_WIDTH x ZONE_CANVAS_HEIGHT canvas
+            anchors *= (ZONE_CANVAS_WIDTH / frame_size[0], ZONE_CANVAS_HEIGHT / frame_size[1])
+
+        inside = state.compiled.contains(anchors)
+        now = time.monotonic()
+        increments: Dict[str, Dict[str, int]] = {}
+        with self._lock:
+            for row, zone_index in zip(*np.nonzero(inside)):
+                zone = state.compiled.names[zone_index]
+                seen = state.seen.setdefault(zone, {})
+                track_id = track_ids[row]
+                if track_id not in seen:
+                    counts = increments.setdefault(zone, {"number_of_motorbike": 0, "number_of_car": 0})
+                    counts[fields[row]] += 1
+                seen[track_id] = now
+            self._prune(state, now)
+        return increments
+
+
+# Singleton instance
+zone_counter = ZoneCounter()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The backend's modules import each other from its root (`import config`, `services....`)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,146 @@
+import asyncio
+import threading
+
+import pytest
+
+from services.state_backend import InProcessStateBackend, RedisStateBackend, StateBackend
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture(scope="module")
+def redis_url():
+    """A local stand-in for Redis, spoken to over TCP like the real one."""
+    class Server(fakeredis.TcpFakeServer):
+        request_queue_size = 256  # concurrent increments open many connections at once
+
+    server = Server(("127.0.0.1", 0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    yield f"redis://{host}:{port}/0"
+    server.shutdown()
+    server.server_close()
+
+
+_prefixes = iter(range(1_000_000))
+
+
+@pytest.fixture
+def prefix():
+    # Each test gets its own keys on the shared server
+    return f"test{next(_prefixes)}:"
+
+
+async def _settle(condition, timeout=2.0):
+    """Waits for pub/sub deliveries to make `condition` true."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.01)
+
+
+def test_state_backend_is_abstract():
+    with pytest.raises(TypeError):
+        StateBackend()
+
+
+def test_merge_only_grows():
+    backend = InProcessStateBackend()
+
+    assert backend._merge("cam", {"zone0": (5, 2)}) == {"zone0": (5, 2)}
+    # Totals that arrive late or out of order never lower the counts
+    assert backend._merge("cam", {"zone0": (3, 1)}) == {}
+    assert backend._merge("cam", {"zone0": (4, 4)}) == {"zone0": (0, 2)}
+
+    assert backend.counts("cam") == {"zone0": {"number_of_motorbike": 5, "number_of_car": 4}}
+    assert backend.totals("cam") == {"number_of_motorbike": 5, "number_of_car": 4}
+    assert backend.site_totals() == {"number_of_motorbike": 5, "number_of_car": 4}
+
+
+def test_in_process_increment_notifies():
+    backend = InProcessStateBackend()
+    changes = []
+    backend.on_change(lambda camera_id, deltas: changes.append((camera_id, deltas)))
+
+    asyncio.run(backend.increment({"cam": {"zone0": (1, 2)}}))
+
+    assert changes == [("cam", {"zone0": (1, 2)})]
+    assert backend.counts("cam")["zone0"] == {"number_of_motorbike": 1, "number_of_car": 2}
+
+
+def test_redis_concurrent_increments_are_atomic(redis_url, prefix):
+    async def scenario():
+        first = RedisStateBackend(url=redis_url, prefix=prefix)
+        second = RedisStateBackend(url=redis_url, prefix=prefix)
+        await first.start()
+        await second.start()
+        try:
+            increments = {"cam1": {"zone0": (1, 0), "zone1": (0, 1)}, "cam2": {"zone0": (2, 1)}}
+            await asyncio.gather(*(
+                backend.increment(increments) for _ in range(50) for backend in (first, second)
+            ))
+            expected = {
+                "cam1": {"zone0": {"number_of_motorbike": 100, "number_of_car": 0},
+                         "zone1": {"number_of_motorbike": 0, "number_of_car": 100}},
+                "cam2": {"zone0": {"number_of_motorbike": 200, "number_of_car": 100}},
+            }
+            for backend in (first, second):
+                await _settle(lambda: {cam: backend.counts(cam) for cam in expected} == expected)
+                assert backend.site_totals() == {"number_of_motorbike": 300, "number_of_car": 200}
+
+            # A worker started later loads the same totals from the server
+            third = RedisStateBackend(url=redis_url, prefix=prefix)
+            await third.start()
+            try:
+                assert {cam: third.counts(cam) for cam in expected} == expected
+            finally:
+                await third.stop()
+        finally:
+            await first.stop()
+            await second.stop()
+
+    asyncio.run(scenario())
+
+
+def test_redis_on_change_reaches_other_instances(redis_url, prefix):
+    async def scenario():
+        first = RedisStateBackend(url=redis_url, prefix=prefix)
+        second = RedisStateBackend(url=redis_url, prefix=prefix)
+        seen_by_first, seen_by_second = [], []
+        first.on_change(lambda camera_id, deltas: seen_by_first.append((camera_id, deltas)))
+        second.on_change(lambda camera_id, deltas: seen_by_second.append((camera_id, deltas)))
+        await first.start()
+        await second.start()
+        try:
+            await first.increment({"cam": {"zone0": (2, 1)}})
+            await first.increment({"cam": {"zone0": (1, 0)}})
+            await _settle(lambda: second.counts("cam").get("zone0", {}).get("number_of_motorbike") == 3)
+
+            # The incrementing worker is notified once per change, not again by its own publish
+            assert seen_by_first == [("cam", {"zone0": (2, 1)}), ("cam", {"zone0": (1, 0)})]
+            assert seen_by_second == [("cam", {"zone0": (2, 1)}), ("cam", {"zone0": (1, 0)})]
+        finally:
+            await first.stop()
+            await second.stop()
+
+    asyncio.run(scenario())
+
+
+def test_redis_snapshots_are_shared(redis_url, prefix):
+    async def scenario():
+        first = RedisStateBackend(url=redis_url, prefix=prefix)
+        second = RedisStateBackend(url=redis_url, prefix=prefix)
+        await first.start()
+        await second.start()
+        try:
+            assert await second.load_snapshot("overview", "cam") == {}
+            await first.save_snapshot("overview", "cam", {"zone0": {"number_of_car": 3}})
+            assert await second.load_snapshot("overview", "cam") == {"zone0": {"number_of_car": 3}}
+            assert await second.load_snapshot("other", "cam") == {}
+        finally:
+            await first.stop()
+            await second.stop()
+
+    asyncio.run(scenario())
@@ -1,7 +1,22 @@
 import base64
 
+from fastapi import HTTPException
+
 def image_to_base64(image_path):
     """Convert an image to Base64."""
     with open(image_path, "rb") as image_file:
         base64_string = base64.b64encode(image_file.read()).decode("utf-8")
-    return base64_string
\ No newline at end of file
+    return base64_string
+
+def etag_matches(if_none_match, etag):
+    """Whether an If-None-Match header value matches the given ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in tags or f"W/{etag}" in tags
+
+def retry_later(detail, retry_after):
+    """A 503 telling the client when to retry."""
+    return HTTPException(status_code=503, detail=detail, headers={"Retry-After": str(retry_after)})
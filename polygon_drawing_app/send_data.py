@@ -2,7 +2,7 @@ import requests
 import time
 import random
 
-API_URL = "http://localhost:5101/api/v1/tracking/vehicle-data-batch"
+API_URL = "http://localhost:5101/api/v1/tracking/vehicle-data-bulk"
 CAMERA_ID = ["SN003", "SN004"]
 
 
@@ -27,17 +27,18 @@ def generate_mock_data(camera_id):
     return payload
 
 def send_data_to_api():
-    """Gửi dữ liệu đến API mỗi 0.01 giây."""
+    """Gửi dữ liệu của tất cả camera trong một request mỗi 0.01 giây."""
+    # Dùng chung một Session để tái sử dụng kết nối HTTP
+    session = requests.Session()
     while True:
-        for camera_id in CAMERA_ID:
-            data_to_send = generate_mock_data(camera_id)
-            try:
-                response = requests.post(API_URL, json=data_to_send)
-                response.raise_for_status()
-                print(f"[{time.strftime('%H:%M:%S')}] Đã gửi dữ liệu thành công cho camera {CAMERA_ID}. Trạng thái: {response.status_code}")
-            except requests.exceptions.RequestException as e:
-                print(f"[{time.strftime('%H:%M:%S')}] Lỗi khi gửi dữ liệu: {e}")
-        
+        payload = {"batches": [generate_mock_data(camera_id) for camera_id in CAMERA_ID]}
+        try:
+            response = session.post(API_URL, json=payload)
+            response.raise_for_status()
+            print(f"[{time.strftime('%H:%M:%S')}] Đã gửi dữ liệu thành công cho camera {CAMERA_ID}. Trạng thái: {response.status_code}")
+        except requests.exceptions.RequestException as e:
+            print(f"[{time.strftime('%H:%M:%S')}] Lỗi khi gửi dữ liệu: {e}")
+
         time.sleep(0.01)
 if __name__ == "__main__":
     print("Bắt đầu gửi dữ liệu giả lập...")